@@ -1,16 +1,20 @@
 from fastapi import HTTPException, status, Depends, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from typing import Optional
 import os
 from dotenv import load_dotenv
-import bcrypt
 from jose import jwt, JWTError
 import hashlib
 import random
 
 from app.models.admin import Admin, AdminRefreshToken
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
+from app.core.password_hasher import password_hasher
+from app.core.principal_cache import AdminPrincipal, invalidate_admin_principal
 from .schemas import AdminRegister, AdminLogin, AdminResponse, TokenResponse, AdminForgotPasswordEmailSchema, AdminForgotPasswordVerifySchema, AdminForgotPasswordResetSchema, AdminChangePasswordSchema
 from pydantic import BaseModel
 from pydantic import EmailStr
@@ -42,23 +46,17 @@ REFRESH_TOKEN_EXPIRE_DAYS = 7
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a plain password against a hashed password using bcrypt.
+    Runs on the bounded password hashing pool.
     """
-    # Truncate password to 72 bytes (bcrypt limit)
-    password_bytes = plain_password.encode('utf-8')[:72]
-    return bcrypt.checkpw(password_bytes, hashed_password.encode('utf-8'))
+    return password_hasher.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """
     Hash a password using bcrypt.
-    Truncates password to 72 bytes as required by bcrypt.
+    Runs on the bounded password hashing pool, which truncates to bcrypt's 72 bytes.
     """
-    # Truncate password to 72 bytes (bcrypt limit)
-    password_bytes = password.encode('utf-8')[:72]
-    # Generate salt and hash
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
+    return password_hasher.hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -165,13 +163,13 @@ def decode_refresh_token(refresh_token: str) -> dict:
 
 async def register_admin(
         admin_data: AdminRegister,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ) -> AdminResponse:
     """
     Register a new admin. Only one admin is allowed in the system.
     """
     # Check if any admin already exists
-    existing_admin = db.query(Admin).first()
+    existing_admin = (await db.execute(select(Admin.id).limit(1))).first()
     if existing_admin:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -179,15 +177,15 @@ async def register_admin(
         )
 
     # Check if email is already registered (though this should be caught by the unique constraint)
-    email_exists = db.query(Admin).filter(Admin.email == admin_data.email).first()
+    email_exists = (await db.execute(select(Admin.id).where(Admin.email == admin_data.email))).first()
     if email_exists:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
 
-    # Hash the password
-    hashed_password = get_password_hash(admin_data.password)
+    # Hash the password without holding a threadpool thread
+    hashed_password = await password_hasher.hash_async(admin_data.password)
 
     # Create new admin
     new_admin = Admin(
@@ -198,8 +196,8 @@ async def register_admin(
     )
 
     db.add(new_admin)
-    db.commit()
-    db.refresh(new_admin)
+    await db.commit()
+    await db.refresh(new_admin)
 
     return AdminResponse(
         id=new_admin.id,
@@ -212,13 +210,14 @@ async def register_admin(
 
 async def login_admin(
         admin_data: AdminLogin,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ) -> TokenResponse:
     """
     Authenticate admin and return JWT tokens (access + refresh).
+    Async so that waiting for bcrypt holds no threadpool thread.
     """
     # Find admin by email
-    admin = db.query(Admin).filter(Admin.email == admin_data.email).first()
+    admin = (await db.execute(select(Admin).where(Admin.email == admin_data.email))).scalars().first()
 
     if not admin:
         raise HTTPException(
@@ -228,7 +227,7 @@ async def login_admin(
         )
 
     # Verify password
-    if not verify_password(admin_data.password, admin.password_hash):
+    if not await password_hasher.verify_async(admin_data.password, admin.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
@@ -244,11 +243,11 @@ async def login_admin(
         )
 
     # Clean up any revoked refresh tokens for this admin before login
-    db.query(AdminRefreshToken).filter(
+    await db.execute(delete(AdminRefreshToken).where(
         AdminRefreshToken.admin_id == admin.id,
         AdminRefreshToken.is_revoked == True
-    ).delete()
-    db.commit()
+    ))
+    await db.commit()
 
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -272,7 +271,7 @@ async def login_admin(
         last_used_at=datetime.utcnow()
     )
     db.add(db_refresh_token)
-    db.commit()
+    await db.commit()
 
     return TokenResponse(
         access_token=access_token,
@@ -283,7 +282,7 @@ async def login_admin(
 
 
 # ADMIN FORGOT PASSWORD - SEND OTP
-async def admin_forgot_password_send_otp(
+def admin_forgot_password_send_otp(
         admin_data: AdminForgotPasswordEmailSchema,
         db: Session = Depends(get_db)
 ):
@@ -325,7 +324,7 @@ If you did not make this request, we recommend reviewing your account security i
 
 
 # ADMIN FORGOT PASSWORD - VERIFY OTP
-async def admin_forgot_password_verify_otp(
+def admin_forgot_password_verify_otp(
         admin_data: AdminForgotPasswordVerifySchema,
         db: Session = Depends(get_db)
 ):
@@ -354,7 +353,7 @@ async def admin_forgot_password_verify_otp(
 
 
 # ADMIN FORGOT PASSWORD - RESET PASSWORD
-async def admin_forgot_password_reset(
+def admin_forgot_password_reset(
         admin_data: AdminForgotPasswordResetSchema,
         db: Session = Depends(get_db)
 ):
@@ -392,14 +391,15 @@ async def admin_forgot_password_reset(
     admin.otp_created_at = None
 
     db.commit()
+    invalidate_admin_principal(admin.id)
 
     return {"message": "Password reset successfully. All sessions have been logged out. Please login again."}
 
 
 # ADMIN CHANGE PASSWORD
-async def admin_change_password(
+def admin_change_password(
         password_data: AdminChangePasswordSchema,
-        current_admin: Admin = Depends(get_current_admin),
+        current_admin: AdminPrincipal = Depends(get_current_admin),
         db: Session = Depends(get_db)
 ):
     """
@@ -432,13 +432,14 @@ async def admin_change_password(
     # Update password with new hashed password
     admin.password_hash = get_password_hash(password_data.new_password)
     db.commit()
+    invalidate_admin_principal(admin.id)
     
     return {"message": "Password changed successfully"}
 
 
 # ADMIN PROFILE MANAGEMENT
-async def get_admin_profile(
-        current_admin: Admin = Depends(get_current_admin),
+def get_admin_profile(
+        current_admin: AdminPrincipal = Depends(get_current_admin),
         db: Session = Depends(get_db)
 ):
 
@@ -467,14 +468,14 @@ async def update_admin_profile(
         name: Optional[str] = Form(None),
         email: Optional[str] = Form(None),
         bio: Optional[str] = Form(None),
-        current_admin: Admin = Depends(get_current_admin),
-        db: Session = Depends(get_db)
+        current_admin: AdminPrincipal = Depends(get_current_admin),
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update admin profile with optional image upload using form data.
     """
     # Get fresh admin data from database
-    admin = db.query(Admin).filter(Admin.id == current_admin.id).first()
+    admin = await db.get(Admin, current_admin.id)
     
     if not admin:
         raise HTTPException(
@@ -497,7 +498,7 @@ async def update_admin_profile(
             
             # Delete old image from Cloudinary if it exists
             if old_image_path:
-                admin_image_service.delete_old_profile_image(old_image_path)
+                await run_in_threadpool(admin_image_service.delete_old_profile_image, old_image_path)
         
         # Update other fields from form data
         if name is not None:
@@ -508,10 +509,9 @@ async def update_admin_profile(
         
         if email is not None:
             # Check if email is already taken by another admin
-            existing_admin = db.query(Admin).filter(
-                Admin.email == email,
-                Admin.id != admin.id
-            ).first()
+            existing_admin = (await db.execute(
+                select(Admin.id).where(Admin.email == email, Admin.id != admin.id)
+            )).first()
             if existing_admin:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -519,8 +519,9 @@ async def update_admin_profile(
                 )
             admin.email = email
         
-        db.commit()
-        db.refresh(admin)
+        await db.commit()
+        invalidate_admin_principal(admin.id)
+        await db.refresh(admin)
         
         return {
             "message": "Profile updated successfully",
@@ -540,5 +541,5 @@ async def update_admin_profile(
         raise
     except Exception as e:
         # Rollback database changes on error
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to update profile: {str(e)}")
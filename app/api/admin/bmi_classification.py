@@ -8,13 +8,13 @@ from app.core.database import get_db
 from app.models.bmi_classification import BMIClassification
 from app.api.admin.schemas import BMIClassificationCreate, BMIClassificationResponse, BMIClassificationUpdate
 from app.api.admin.dependencies import get_current_active_admin
-from app.models.admin import Admin
+from app.core.principal_cache import AdminPrincipal
 
 
 def create_bmi_classification(
     bmi_data: BMIClassificationCreate,
     db: Session = Depends(get_db),
-    current_admin: Admin = Depends(get_current_active_admin)
+    current_admin: AdminPrincipal = Depends(get_current_active_admin)
 ) -> BMIClassificationResponse:
     """
     Create a new BMI classification category.
@@ -70,7 +70,7 @@ def get_bmi_classifications_paginated(
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(10, ge=1, le=1000, description="Maximum records to return"),
     db: Session = Depends(get_db),
-    current_admin: Admin = Depends(get_current_active_admin)
+    current_admin: AdminPrincipal = Depends(get_current_active_admin)
 ) -> dict:
     """
     Get all BMI classifications with pagination.
@@ -115,7 +115,7 @@ def get_bmi_classifications_paginated(
 def get_bmi_classification_by_id(
     bmi_id: int,
     db: Session = Depends(get_db),
-    current_admin: Admin = Depends(get_current_active_admin)
+    current_admin: AdminPrincipal = Depends(get_current_active_admin)
 ) -> BMIClassificationResponse:
     """
     Get a specific BMI classification by ID.
@@ -141,7 +141,7 @@ def update_bmi_classification(
     bmi_id: int,
     bmi_data: BMIClassificationUpdate,
     db: Session = Depends(get_db),
-    current_admin: Admin = Depends(get_current_active_admin)
+    current_admin: AdminPrincipal = Depends(get_current_active_admin)
 ) -> BMIClassificationResponse:
     """
     Update an existing BMI classification.
@@ -211,7 +211,7 @@ def update_bmi_classification(
 def delete_bmi_classification(
     bmi_id: int,
     db: Session = Depends(get_db),
-    current_admin: Admin = Depends(get_current_active_admin)
+    current_admin: AdminPrincipal = Depends(get_current_active_admin)
 ) -> dict:
     """
     Delete a BMI classification.
@@ -11,7 +11,7 @@ from app.models.workout import Workout
 from app.models.meal import Meal
 from app.models.subscription import Subscription
 
-async def get_overview(
+def get_overview(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_admin)
 ):
@@ -49,7 +49,7 @@ async def get_overview(
     }
 
 
-async def get_all_users(
+def get_all_users(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_admin)
 ):
@@ -1,12 +1,13 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from jose import JWTError, jwt
+from jose import JWTError
 import os
 from dotenv import load_dotenv
 
 from app.core.database import get_db
-from app.models.admin import Admin
+from app.core.jwt_utils import decode_verified_token
+from app.core.principal_cache import AdminPrincipal, get_admin_principal
 
 # Load environment variables
 load_dotenv()
@@ -19,10 +20,14 @@ ALGORITHM = "HS256"
 security = HTTPBearer()
 
 
-async def get_current_admin(
+def get_current_admin(
         credentials: HTTPAuthorizationCredentials = Depends(security),
         db: Session = Depends(get_db)
-) -> Admin:
+) -> AdminPrincipal:
+    """
+    Get a read-only snapshot of the current admin, served from the admin
+    principal cache. Handlers that modify the admin load the Admin row by id.
+    """
 
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -31,12 +36,8 @@ async def get_current_admin(
     )
 
     try:
-        # Decode the JWT token
-        payload = jwt.decode(
-            credentials.credentials,
-            ADMIN_SECRET_KEY,
-            algorithms=[ALGORITHM]
-        )
+        # Decode the JWT token (verified once, then served from the token cache)
+        payload = decode_verified_token(credentials.credentials, ADMIN_SECRET_KEY, "admin")
 
         # Extract admin_id from token
         admin_id: int = payload.get("admin_id")
@@ -47,8 +48,8 @@ async def get_current_admin(
     except JWTError:
         raise credentials_exception
 
-    # Get admin from database
-    admin = db.query(Admin).filter(Admin.id == admin_id).first()
+    # Get admin from the principal cache (database on a miss)
+    admin = get_admin_principal(db, admin_id)
 
     if admin is None:
         raise credentials_exception
@@ -64,13 +65,8 @@ async def get_current_admin(
     return admin
 
 
-async def get_current_active_admin(
-        current_admin: Admin = Depends(get_current_admin)
-) -> Admin:
-
-    if not current_admin.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Admin account is deactivated"
-        )
+def get_current_active_admin(
+        current_admin: AdminPrincipal = Depends(get_current_admin)
+) -> AdminPrincipal:
+    """get_current_admin already rejects deactivated admins."""
     return current_admin
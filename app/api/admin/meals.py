@@ -1,4 +1,6 @@
 from fastapi import Depends, Query, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from typing import Optional, List
@@ -6,8 +8,8 @@ from math import ceil
 from datetime import datetime
 
 from app.models.meal import Meal
-from app.models.admin import Admin
-from app.core.database import get_db
+from app.core.principal_cache import AdminPrincipal
+from app.core.database import get_db, get_async_db
 from .dependencies import get_current_admin
 from .schemas import (
     MealResponse, MealCreate, MealUpdate, PaginatedResponse, PaginationInfo
@@ -22,8 +24,8 @@ async def create_meal(
         calories: int = Form(...),
         description: Optional[str] = Form(None),
         image: Optional[UploadFile] = File(None),
-        db: Session = Depends(get_db),
-        current_admin: Admin = Depends(get_current_admin)
+        db: AsyncSession = Depends(get_async_db),
+        current_admin: AdminPrincipal = Depends(get_current_admin)
 ) -> MealResponse:
 
     # Handle image upload if provided
@@ -43,8 +45,8 @@ async def create_meal(
         )
 
     db.add(new_meal)
-    db.commit()
-    db.refresh(new_meal)
+    await db.commit()
+    await db.refresh(new_meal)
 
     return MealResponse(
         id=new_meal.id,
@@ -58,7 +60,7 @@ async def create_meal(
     )
 
 
-async def get_meals_paginated(
+def get_meals_paginated(
         skip: int = Query(0, ge=0, description="Number of records to skip"),
         limit: int = Query(10, ge=1, le=1000, description="Maximum records to return"),
         search: Optional[str] = Query(None, description="Search term for food item"),
@@ -66,7 +68,7 @@ async def get_meals_paginated(
         min_calories: Optional[int] = Query(None, description="Filter by minimum calories"),
         max_calories: Optional[int] = Query(None, description="Filter by maximum calories"),
         db: Session = Depends(get_db),
-        current_admin: Admin = Depends(get_current_admin)
+        current_admin: AdminPrincipal = Depends(get_current_admin)
 ) -> dict:
 
     # Build query
@@ -125,10 +127,10 @@ async def get_meals_paginated(
     }
 
 
-async def get_meal_by_id(
+def get_meal_by_id(
         meal_id: int,
         db: Session = Depends(get_db),
-        current_admin: Admin = Depends(get_current_admin)
+        current_admin: AdminPrincipal = Depends(get_current_admin)
 ) -> Optional[MealResponse]:
 
     meal = db.query(Meal).filter(Meal.id == meal_id).first()
@@ -156,11 +158,11 @@ async def update_meal(
         bmi_category_id: Optional[int] = Form(None),
         description: Optional[str] = Form(None),
         image: Optional[UploadFile] = File(None),
-        db: Session = Depends(get_db),
-        current_admin: Admin = Depends(get_current_admin)
+        db: AsyncSession = Depends(get_async_db),
+        current_admin: AdminPrincipal = Depends(get_current_admin)
 ) -> Optional[MealResponse]:
 
-    meal = db.query(Meal).filter(Meal.id == meal_id).first()
+    meal = await db.get(Meal, meal_id)
 
     if not meal:
         return None
@@ -170,7 +172,7 @@ async def update_meal(
         image_service = MealImageService()
         # Delete old image if exists
         if meal.meal_image:
-            image_service.delete_old_meal_image(meal.meal_image)
+            await run_in_threadpool(image_service.delete_old_meal_image, meal.meal_image)
         # Upload new image
         meal.meal_image = await image_service.save_meal_image(image, meal_id)
 
@@ -186,8 +188,8 @@ async def update_meal(
     if description is not None:
         meal.description = description
 
-    db.commit()
-    db.refresh(meal)
+    await db.commit()
+    await db.refresh(meal)
 
     return MealResponse(
         id=meal.id,
@@ -201,10 +203,10 @@ async def update_meal(
     )
 
 
-async def delete_meal(
+def delete_meal(
         meal_id: int,
         db: Session = Depends(get_db),
-        current_admin: Admin = Depends(get_current_admin)
+        current_admin: AdminPrincipal = Depends(get_current_admin)
 ) -> dict:
 
     meal = db.query(Meal).filter(Meal.id == meal_id).first()
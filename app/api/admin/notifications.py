@@ -1,11 +1,14 @@
-from fastapi import Depends, HTTPException, Query
+from fastapi import Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_
+from sqlalchemy import desc, tuple_, update
 from typing import List, Dict, Any, Optional
+from collections import Counter
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.models.user_activity_log import UserActivityLog
+from app.services.notification_counters import notification_counters
 from app.services.notification_service import notification_service, ADMIN_IMPORTANT_ACTIVITIES
 from app.core.websocket_manager import websocket_manager
 from app.utils.activity_logger import time_ago
@@ -13,25 +16,40 @@ from .dependencies import get_current_admin
 
 
 def get_notifications(
+    response: Response,
     limit: int = Query(50, ge=1, le=100, description="Number of notifications to fetch"),
     activity_type: Optional[str] = Query(None, description="Filter by specific activity type"),
     include_read: bool = Query(False, description="Include read notifications (default: False - only unread)"),
+    before_id: Optional[int] = Query(None, description="Fetch notifications older than this one (id of the last notification of the previous page)"),
+    before_created_at: Optional[datetime] = Query(None, description="created_at of the last notification of the previous page"),
     db: Session = Depends(get_db),
     current_admin = Depends(get_current_admin)
 ) -> List[Dict[str, Any]]:
     """
-    Get recent admin notifications (important activity logs).
+    Get admin notifications (important activity logs), newest first.
+    
+    Pages are keyset paginated: pass the id and created_at of the last
+    notification of a page (also returned in the X-Next-Before-Id and
+    X-Next-Before-Created-At headers when more exist) to get the next one.
     
     Args:
         limit: Number of notifications to fetch (default: 50, max: 100)
         activity_type: Optional filter for specific activity type
         include_read: Whether to include read notifications (default: False - only unread)
+        before_id: Keyset cursor, together with before_created_at
+        before_created_at: Keyset cursor, together with before_id
         db: Database session
         current_admin: Current authenticated admin
     
     Returns:
         List of notification objects with detailed information
     """
+    if (before_id is None) != (before_created_at is None):
+        raise HTTPException(
+            status_code=400,
+            detail="before_id and before_created_at must be given together"
+        )
+    
     try:
         # Build the query
         query = db.query(UserActivityLog)
@@ -49,8 +67,21 @@ def get_notifications(
         if not include_read:
             query = query.filter(UserActivityLog.is_read == False)
         
-        # Order by created_at DESC and limit
-        recent_logs = query.order_by(desc(UserActivityLog.created_at)).limit(limit).all()
+        # Continue after the previous page without OFFSET
+        if before_id is not None:
+            query = query.filter(
+                tuple_(UserActivityLog.created_at, UserActivityLog.id) < tuple_(before_created_at, before_id)
+            )
+        
+        # Order by created_at DESC (id breaks ties) and fetch one extra row to detect a next page
+        recent_logs = query.order_by(
+            desc(UserActivityLog.created_at), desc(UserActivityLog.id)
+        ).limit(limit + 1).all()
+        
+        if len(recent_logs) > limit:
+            recent_logs = recent_logs[:limit]
+            response.headers["X-Next-Before-Id"] = str(recent_logs[-1].id)
+            response.headers["X-Next-Before-Created-At"] = recent_logs[-1].created_at.isoformat()
         
         # Format the response
         notifications = []
@@ -129,7 +160,7 @@ def get_activity_types(
 
 async def mark_notification_as_read(
     notification_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin = Depends(get_current_admin)
 ) -> Dict[str, Any]:
     """
@@ -144,29 +175,37 @@ async def mark_notification_as_read(
         Success message with updated notification details
     """
     try:
-        # Find the notification
-        notification = db.query(UserActivityLog).filter(
-            UserActivityLog.id == notification_id
-        ).first()
-        
-        if not notification:
-            raise HTTPException(
-                status_code=404,
-                detail="Notification not found"
-            )
+        # Mark it read only if it is unread, so concurrent requests (a double
+        # click, two admins, mark-all) uncount it once
+        result = await db.execute(
+            update(UserActivityLog)
+            .where(UserActivityLog.id == notification_id, UserActivityLog.is_read == False)
+            .values(is_read=True)
+            .returning(UserActivityLog.activity_type),
+            execution_options={"synchronize_session": False}
+        )
+        marked_type = result.scalar_one_or_none()
         
-        # Update is_read status
-        notification.is_read = True
-        db.commit()
-        db.refresh(notification)
+        if marked_type is None:
+            await db.rollback()
+            # Already read, unless there is no such notification
+            if await db.get(UserActivityLog, notification_id) is None:
+                raise HTTPException(
+                    status_code=404,
+                    detail="Notification not found"
+                )
+        else:
+            await notification_counters.decrement(db, {marked_type: 1})
+            await db.commit()
+            notification_counters.invalidate()
         
         # Broadcast real-time update to all connected clients
         try:
             await websocket_manager.broadcast_event(
                 event="NOTIFICATION_READ",
                 data={
-                    "id": notification.id,
-                    "is_read": notification.is_read
+                    "id": notification_id,
+                    "is_read": True
                 }
             )
         except Exception as e:
@@ -175,14 +214,14 @@ async def mark_notification_as_read(
         
         return {
             "message": "Notification marked as read successfully",
-            "notification_id": notification.id,
-            "is_read": notification.is_read
+            "notification_id": notification_id,
+            "is_read": True
         }
         
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Failed to mark notification as read: {str(e)}"
@@ -191,7 +230,7 @@ async def mark_notification_as_read(
 
 async def mark_all_notifications_as_read(
     activity_type: Optional[str] = Query(None, description="Filter by specific activity type"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin = Depends(get_current_admin)
 ) -> Dict[str, Any]:
     """
@@ -206,30 +245,36 @@ async def mark_all_notifications_as_read(
         Success message with count of marked notifications
     """
     try:
-        # Build query for unread notifications
-        query = db.query(UserActivityLog).filter(UserActivityLog.is_read == False)
+        # Build conditions for unread notifications
+        conditions = [UserActivityLog.is_read == False]
         
         # Filter by activity type if specified
         if activity_type:
-            query = query.filter(UserActivityLog.activity_type == activity_type)
+            conditions.append(UserActivityLog.activity_type == activity_type)
         else:
             # Default to admin-important activities only
-            query = query.filter(UserActivityLog.activity_type.in_(
+            conditions.append(UserActivityLog.activity_type.in_(
                 ADMIN_IMPORTANT_ACTIVITIES
             ))
         
-        # Count unread notifications
-        unread_count = query.count()
+        # Mark all as read; the returned rows are the unread notifications, by type
+        result = await db.execute(
+            update(UserActivityLog).where(*conditions).values(is_read=True).returning(UserActivityLog.activity_type),
+            execution_options={"synchronize_session": False}
+        )
+        marked_by_type = Counter(result.scalars().all())
+        unread_count = sum(marked_by_type.values())
         
         if unread_count == 0:
+            await db.rollback()
             return {
                 "message": "No unread notifications found",
                 "marked_count": 0
             }
         
-        # Mark all as read
-        query.update({UserActivityLog.is_read: True}, synchronize_session=False)
-        db.commit()
+        await notification_counters.decrement(db, marked_by_type)
+        await db.commit()
+        notification_counters.invalidate()
         
         # Broadcast real-time update to all connected clients
         try:
@@ -251,7 +296,7 @@ async def mark_all_notifications_as_read(
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Failed to mark all notifications as read: {str(e)}"
@@ -273,15 +318,8 @@ def get_unread_notifications_count(
         Dictionary with unread notification count
     """
     try:
-        # Count unread admin-important notifications
-        unread_count = db.query(UserActivityLog).filter(
-            and_(
-                UserActivityLog.is_read == False,
-                UserActivityLog.activity_type.in_(
-                    ADMIN_IMPORTANT_ACTIVITIES
-                )
-            )
-        ).count()
+        # Sum the unread counters of admin-important notifications
+        unread_count = notification_counters.get_unread_count(db, ADMIN_IMPORTANT_ACTIVITIES)
         
         return {"unread_count": unread_count}
         
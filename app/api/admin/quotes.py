@@ -6,14 +6,14 @@ from app.core.database import get_db
 from app.models.quotes import Quote
 from app.api.admin.schemas import QuoteCreate, QuoteResponse, QuoteUpdate, SuccessResponse
 from app.api.admin.dependencies import get_current_admin
-from app.models.admin import Admin
+from app.core.principal_cache import AdminPrincipal
 
 
 # Admin endpoints (Protected)
 def create_new_quote(
     quote_data: QuoteCreate, 
     db: Session = Depends(get_db),
-    current_admin: Admin = Depends(get_current_admin)
+    current_admin: AdminPrincipal = Depends(get_current_admin)
 ):
     """
     Create a new motivational quote (Admin only)
@@ -34,7 +34,7 @@ def list_all_quotes_for_admin(
     skip: int = Query(0, ge=0, description="Number of quotes to skip"), 
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of quotes to return"),
     db: Session = Depends(get_db),
-    current_admin: Admin = Depends(get_current_admin)
+    current_admin: AdminPrincipal = Depends(get_current_admin)
 ):
     """
     Get all active quotes with pagination (Admin only)
@@ -47,7 +47,7 @@ def modify_existing_quote(
     quote_id: int, 
     updated_quote_data: QuoteUpdate, 
     db: Session = Depends(get_db),
-    current_admin: Admin = Depends(get_current_admin)
+    current_admin: AdminPrincipal = Depends(get_current_admin)
 ):
     """
     Update an existing quote (Admin only)
@@ -70,7 +70,7 @@ def modify_existing_quote(
 def remove_quote(
     quote_id: int, 
     db: Session = Depends(get_db),
-    current_admin: Admin = Depends(get_current_admin)
+    current_admin: AdminPrincipal = Depends(get_current_admin)
 ):
     """
     Permanently delete a quote from database (Admin only)
@@ -1,17 +1,20 @@
 from fastapi import HTTPException, Depends, Query, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, select
 from typing import Optional, List
 from math import ceil
-import bcrypt
 from datetime import datetime
 from pydantic import BaseModel
 
 from app.models.user import User
-from app.models.admin import Admin
+from app.core.principal_cache import AdminPrincipal
 from app.models.subscription import Subscription
 from app.models.subscription_plans import Plan
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
+from app.core.password_hasher import password_hasher
+from app.core.principal_cache import invalidate_user_principal
 from app.services.image_service import ImageService
 from app.services.notification_service import notification_service
 
@@ -27,30 +30,27 @@ image_service = ImageService()
 
 def hash_password(password: str) -> str:
 
-    # Convert password to bytes and truncate to 72 bytes
-    password_bytes = password.encode('utf-8')[:72]
-    # Generate salt and hash
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
+    # bcrypt runs on the bounded password hashing pool
+    return password_hasher.hash(password)
 
 async def register_user(user: UserRegisterSchema,
-            db: Session = Depends(get_db),
-            current_admin: Admin = Depends(get_current_admin)
+            db: AsyncSession = Depends(get_async_db),
+            current_admin: AdminPrincipal = Depends(get_current_admin)
             ):
 
-    if db.query(User).filter(User.email == user.email).first():
+    existing = await db.execute(select(User.id).where(User.email == user.email))
+    if existing.first():
         raise HTTPException(status_code=400, detail="Email already registered")
 
     new_user = User(
         username=user.username,
         email=user.email,
-        password=hash_password(user.password)
+        password=await password_hasher.hash_async(user.password)
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
     # Create activity log and send notification
     await notification_service.create_activity_and_notify(
@@ -67,14 +67,14 @@ async def register_user(user: UserRegisterSchema,
     )
 
 
-async def get_users_paginated(
+def get_users_paginated(
         skip: int = Query(0, ge=0, description="Number of records to skip"),
         limit: int = Query(10, ge=1, le=1000, description="Maximum records to return"),
         search: Optional[str] = Query(None, description="Search term for email or name"),
         is_verified: Optional[bool] = Query(None, description="Filter by verification status"),
         is_blocked: Optional[bool] = Query(None, description="Filter by blocked status"),
         db: Session = Depends(get_db),
-        current_admin: Admin = Depends(get_current_admin)
+        current_admin: AdminPrincipal = Depends(get_current_admin)
 ) -> dict:
 
     # Build query
@@ -142,10 +142,10 @@ async def get_users_paginated(
     }
 
 
-async def get_user_by_id(
+def get_user_by_id(
         user_id: int,
         db: Session = Depends(get_db),
-        current_admin: Admin = Depends(get_current_admin)
+        current_admin: AdminPrincipal = Depends(get_current_admin)
 ) -> Optional[UserResponse]:
 
     user = db.query(User).filter(User.id == user_id).first()
@@ -183,11 +183,11 @@ async def update_user(
         weight_goal: Optional[float] = Form(None),
         activity_level: Optional[str] = Form(None),
         profile_image: Optional[UploadFile] = File(None),
-        db: Session = Depends(get_db),
-        current_admin: Admin = Depends(get_current_admin)
+        db: AsyncSession = Depends(get_async_db),
+        current_admin: AdminPrincipal = Depends(get_current_admin)
 ) -> Optional[UserResponse]:
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -200,7 +200,7 @@ async def update_user(
 
             # Delete old image first if it exists
             if old_image_path:
-                image_service.delete_old_profile_image(old_image_path)
+                await run_in_threadpool(image_service.delete_old_profile_image, old_image_path)
 
             # Save new profile image
             new_image_path = await image_service.save_profile_image(profile_image, user_id)
@@ -209,9 +209,9 @@ async def update_user(
         # Update other fields if they are provided (not None)
         if email is not None:
             # Check if email is being updated and if it's already taken
-            existing_user = db.query(User).filter(
-                and_(User.email == email, User.id != user_id)
-            ).first()
+            existing_user = (await db.execute(
+                select(User.id).where(and_(User.email == email, User.id != user_id))
+            )).first()
             if existing_user:
                 raise ValueError("Email already taken")
             user.email = email
@@ -231,8 +231,9 @@ async def update_user(
         if activity_level is not None:
             user.activity_level = activity_level
 
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
+        invalidate_user_principal(user_id)
 
         return UserResponse(
             id=user.id,
@@ -256,14 +257,14 @@ async def update_user(
         raise
     except Exception as e:
         # Rollback database changes on error
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to update user: {str(e)}")
 
 
-async def delete_user(
+def delete_user(
         user_id: int,
         db: Session = Depends(get_db),
-        current_admin: Admin = Depends(get_current_admin)
+        current_admin: AdminPrincipal = Depends(get_current_admin)
 ) -> dict:
 
     user = db.query(User).filter(User.id == user_id).first()
@@ -316,6 +317,14 @@ async def delete_user(
             db.delete(activity)
         print(f"Deleted {len(yearly_activities)} yearly activity records for user {user_id}")
 
+        # Step 4b: Delete the user's rollup bookkeeping
+        from app.models.rollup_state import UserRollupState, UserRollupOpenMonth, UserRollupStatus
+        from app.services.fitness_services import invalidate_rollup_state
+        db.query(UserRollupState).filter(UserRollupState.user_id == user_id).delete()
+        db.query(UserRollupOpenMonth).filter(UserRollupOpenMonth.user_id == user_id).delete()
+        db.query(UserRollupStatus).filter(UserRollupStatus.user_id == user_id).delete()
+        invalidate_rollup_state(user_id)
+
         # Step 5: Delete all subscription records for the user
         subscriptions = db.query(Subscription).filter(Subscription.user_id == user_id).all()
         for subscription in subscriptions:
@@ -349,6 +358,7 @@ async def delete_user(
         # Step 7: Delete the user
         db.delete(user)
         db.commit()
+        invalidate_user_principal(user_id)
 
         return {"message": f"User {user_id} and all associated records deleted successfully"}
 
@@ -357,13 +367,13 @@ async def delete_user(
         raise HTTPException(status_code=500, detail=f"Failed to delete user: {str(e)}")
 
 
-async def get_user_subscriptions_paginated(
+def get_user_subscriptions_paginated(
         skip: int = Query(0, ge=0, description="Number of records to skip"),
         limit: int = Query(10, ge=1, le=1000, description="Maximum records to return"),
         search: Optional[str] = Query(None, description="Search term for username or plan name"),
         status: Optional[str] = Query(None, description="Filter by subscription status"),
         db: Session = Depends(get_db),
-        current_admin: Admin = Depends(get_current_admin)
+        current_admin: AdminPrincipal = Depends(get_current_admin)
 ) -> dict:
 
     # Build query with joins
@@ -440,10 +450,10 @@ async def get_user_subscriptions_paginated(
     }
 
 
-async def get_user_subscription_by_id(
+def get_user_subscription_by_id(
         subscription_id: int,
         db: Session = Depends(get_db),
-        current_admin: Admin = Depends(get_current_admin)
+        current_admin: AdminPrincipal = Depends(get_current_admin)
 ) -> UserSubscriptionResponse:
 
     # Query with joins
@@ -485,11 +495,11 @@ async def get_user_subscription_by_id(
     )
 
 
-async def update_user_subscription(
+def update_user_subscription(
         subscription_id: int,
         subscription_update: UserSubscriptionUpdate,
         db: Session = Depends(get_db),
-        current_admin: Admin = Depends(get_current_admin)
+        current_admin: AdminPrincipal = Depends(get_current_admin)
 ) -> UserSubscriptionResponse:
 
     # Get existing subscription
@@ -1,14 +1,16 @@
 from fastapi import Depends, Query, UploadFile, File, Form, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, select
 from typing import Optional, List
 from math import ceil
 from datetime import datetime
 import os
 
 from app.models.workout import Workout
-from app.models.admin import Admin
-from app.core.database import get_db
+from app.core.principal_cache import AdminPrincipal
+from app.core.database import get_db, get_async_db
 from app.services.workout_media_service import WorkoutMediaService
 from .dependencies import get_current_admin
 from .schemas import (
@@ -27,7 +29,7 @@ async def create_workout(
         workout_category: str = Form(...),
         workout_image: Optional[UploadFile] = File(None),
         workout_video: Optional[UploadFile] = File(None),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
 
     # Validate activity_level
@@ -45,12 +47,12 @@ async def create_workout(
         )
 
     # Check if workout already exists
-    existing_workout = db.query(Workout).filter(
+    existing_workout = (await db.execute(select(Workout).where(
         Workout.title == title,
         Workout.activity_level == activity_level,
         Workout.duration == duration,
         Workout.calorie_burn == calorie_burn
-    ).first()
+    ))).scalars().first()
 
     if existing_workout:
         raise HTTPException(
@@ -72,8 +74,8 @@ async def create_workout(
 
     db_workout = Workout(**workout_data)
     db.add(db_workout)
-    db.commit()
-    db.refresh(db_workout)
+    await db.commit()
+    await db.refresh(db_workout)
 
     try:
         # Save media files using the generated workout ID
@@ -87,8 +89,8 @@ async def create_workout(
         # Update workout record with file paths
         db_workout.workout_image_url = image_path or ""
         db_workout.workout_video_url = video_path or ""
-        db.commit()
-        db.refresh(db_workout)
+        await db.commit()
+        await db.refresh(db_workout)
 
         return WorkoutResponse(
             id=db_workout.id,
@@ -105,26 +107,26 @@ async def create_workout(
 
     except Exception as e:
         # Rollback on error
-        db.rollback()
+        await db.rollback()
         # Clean up any created media files
         if image_path:
-            media_service.delete_old_workout_media(image_path, None)
+            await run_in_threadpool(media_service.delete_old_workout_media, image_path, None)
         if video_path:
-            media_service.delete_old_workout_media(None, video_path)
+            await run_in_threadpool(media_service.delete_old_workout_media, None, video_path)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to save workout media: {str(e)}"
         )
 
 
-async def get_workouts_paginated(
+def get_workouts_paginated(
         skip: int = Query(0, ge=0, description="Number of records to skip"),
         limit: int = Query(10, ge=1, le=1000, description="Maximum records to return"),
         search: Optional[str] = Query(None, description="Search term for title or description"),
         category: Optional[str] = Query(None, description="Filter by workout category"),
         difficulty_level: Optional[str] = Query(None, description="Filter by difficulty level"),
         db: Session = Depends(get_db),
-        current_admin: Admin = Depends(get_current_admin)
+        current_admin: AdminPrincipal = Depends(get_current_admin)
 ) -> dict:
 
     # Build query
@@ -187,10 +189,10 @@ async def get_workouts_paginated(
     }
 
 
-async def get_workout_by_id(
+def get_workout_by_id(
         workout_id: int,
         db: Session = Depends(get_db),
-        current_admin: Admin = Depends(get_current_admin)
+        current_admin: AdminPrincipal = Depends(get_current_admin)
 ) -> Optional[WorkoutResponse]:
 
     workout = db.query(Workout).filter(Workout.id == workout_id).first()
@@ -222,11 +224,11 @@ async def update_workout(
         workout_category: Optional[str] = Form(None),
         workout_image: Optional[UploadFile] = File(None),
         workout_video: Optional[UploadFile] = File(None),
-        db: Session = Depends(get_db),
-        current_admin: Admin = Depends(get_current_admin)
+        db: AsyncSession = Depends(get_async_db),
+        current_admin: AdminPrincipal = Depends(get_current_admin)
 ) -> Optional[WorkoutResponse]:
 
-    workout = db.query(Workout).filter(Workout.id == workout_id).first()
+    workout = await db.get(Workout, workout_id)
 
     if not workout:
         return None
@@ -285,14 +287,14 @@ async def update_workout(
             # Delete old image if new image was uploaded
             if old_image_path and new_image_path:
                 print(f"Deleting old image: {old_image_path}")
-                media_service.delete_old_workout_media(old_image_path, None)
+                await run_in_threadpool(media_service.delete_old_workout_media, old_image_path, None)
             # Delete old video if new video was uploaded  
             if old_video_path and new_video_path:
                 print(f"Deleting old video: {old_video_path}")
-                media_service.delete_old_workout_media(None, old_video_path)
+                await run_in_threadpool(media_service.delete_old_workout_media, None, old_video_path)
 
-        db.commit()
-        db.refresh(workout)
+        await db.commit()
+        await db.refresh(workout)
 
         return WorkoutResponse(
             id=workout.id,
@@ -309,17 +311,17 @@ async def update_workout(
 
     except Exception as e:
         # Rollback on error
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update workout: {str(e)}"
         )
 
 
-async def delete_workout(
+def delete_workout(
         workout_id: int,
         db: Session = Depends(get_db),
-        current_admin: Admin = Depends(get_current_admin)
+        current_admin: AdminPrincipal = Depends(get_current_admin)
 ) -> dict:
 
     workout = db.query(Workout).filter(Workout.id == workout_id).first()
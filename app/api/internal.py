@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends
+
+from app.api.admin.dependencies import get_current_active_admin
+from app.core.database import async_engine, get_pool_stats, DB_PGBOUNCER_MODE
+from app.core.password_hasher import password_hasher
+from app.core.principal_cache import AdminPrincipal
+from app.services.activity_pipeline import activity_pipeline
+
+router = APIRouter()
+
+
+#Get database connection pool usage of this worker process
+def get_pool_status(current_admin: AdminPrincipal = Depends(get_current_active_admin)):
+
+    return {
+        "pgbouncer_mode": DB_PGBOUNCER_MODE,
+        "sync": get_pool_stats(),
+        "async": get_pool_stats(async_engine.sync_engine.pool)
+    }
+
+
+#Get bcrypt worker pool usage of this worker process
+def get_password_hashing_status(current_admin: AdminPrincipal = Depends(get_current_active_admin)):
+
+    return password_hasher.get_stats()
+
+
+#Get activity log pipeline backlog and dropped events of this worker process
+def get_activity_pipeline_status(current_admin: AdminPrincipal = Depends(get_current_active_admin)):
+
+    return activity_pipeline.get_stats()
+
+
+# Operational endpoints (admin only)
+router.get("/pool")(get_pool_status)
+router.get("/password-hashing")(get_password_hashing_status)
+router.get("/activity-pipeline")(get_activity_pipeline_status)
@@ -1,10 +1,12 @@
-from fastapi import Depends, HTTPException, Query
+from fastapi import Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, and_, text
-from datetime import datetime, date
-from typing import List
-import calendar
+from sqlalchemy import func, and_, text
+from datetime import datetime, date, timedelta
+from typing import List, Optional
+import hashlib
 from app.services.fitness_services import FitnessActivityService
+from app.services.rollup_worker import rollup_worker
+from app.utils.date_ranges import month_range, month_week_ranges
 
 
 from app.core.database import get_db
@@ -14,10 +16,23 @@ from app.models.activity import DailyActivity
 from app.schemas.activity import (
     DailyActivityRequest, DailyActivityResponse, WeeklyAnalyticsResponse,
     WeeklyActivityData, MonthlySummaryResponse, UserDailyActivityResponse, MonthlyActivityResponse,
-    YearlyActivityResponse
+    YearlyActivityResponse, RollupStatusResponse, DailyActivityBatchRequest, DailyActivityBatchResponse,
+    WeeklyRangeAnalyticsResponse, MAX_ANALYTICS_WEEKS, DEFAULT_DAILY_ACTIVITY_PAGE_SIZE,
+    MAX_DAILY_ACTIVITY_PAGE_SIZE
 )
 
 
+def validate_activity_date(activity_date: date):
+    """Reject activity dates more than one year in the future."""
+    today = date.today()
+    max_future_date = today.replace(year=today.year + 1, month=12, day=31)
+    if activity_date > max_future_date:
+        raise HTTPException(
+            status_code=400,
+            detail="Activity date cannot be more than 1 year in the future"
+        )
+
+
 def store_daily_activity(
         data: DailyActivityRequest,
         current_user_id: int = Depends(get_current_user_id),
@@ -32,159 +47,80 @@ def store_daily_activity(
         )
 
     # Validate date is not too far in future (allow current month)
-    today = date.today()
-    max_future_date = today.replace(year=today.year + 1, month=12, day=31)
-    if data.activity_date > max_future_date:
-        raise HTTPException(
-            status_code=400,
-            detail="Activity date cannot be more than 1 year in the future"
-        )
+    validate_activity_date(data.activity_date)
 
     #Initialize fitness service
     fitness_service = FitnessActivityService(db)
 
     try:
         #Store/Update daily activity (UPSERT logic)
-        daily_record_id = fitness_service.upsert_daily_activity(
+        fitness_service.upsert_daily_activity(
             current_user_id, data.activity_date, data.steps,
             data.distance_km, data.calories, data.active_minutes
         )
 
-        #Check if monthly summarization should be triggered
-        should_summarize = fitness_service.should_trigger_monthly_summary(
-            current_user_id, data.activity_date
+        # Monthly/yearly rollups run in the background worker; the phone can poll
+        # GET /activity/rollup-status for the outcome. The eligibility check is
+        # normally answered from cache, so most syncs queue nothing.
+        rollup_status = None
+        if fitness_service.is_rollup_due(current_user_id, data.activity_date):
+            rollup_status = rollup_worker.enqueue(current_user_id, data.activity_date, db=db)
+
+        return MonthlySummaryResponse(
+            message="Daily activity stored successfully.",
+            daily_activity_stored=True,
+            monthly_summary_created=False,
+            daily_records_deleted=0,
+            rollup_status=rollup_status
         )
 
-        monthly_summary_data = None
-        daily_records_deleted = 0
-        old_monthly_records_deleted = 0
-
-        if should_summarize:
-            #Get the month to aggregate from stored values
-            if hasattr(fitness_service, '_month_to_aggregate_year'):
-                prev_year = fitness_service._month_to_aggregate_year
-                prev_month = fitness_service._month_to_aggregate_month
-
-                #Aggregate and store monthly summary
-                monthly_summary_data = fitness_service.aggregate_and_store_monthly_summary(
-                    current_user_id, prev_year, prev_month
-                )
-
-                if monthly_summary_data:
-                    daily_records_deleted = monthly_summary_data['daily_records_deleted']
-                    old_monthly_records_deleted = monthly_summary_data['old_monthly_records_deleted']
-
-        # Step 4: Check if yearly summarization should be triggered
-        # Dual-condition system: Q1 complete OR partial/skipped Q1
-        yearly_summary_data = None
-        monthly_records_deleted = 0
-        
-        # Get current year and month from activity date
-        current_year = data.activity_date.year
-        current_month = data.activity_date.month
-        previous_year = current_year - 1
-        
-        # Check if previous year has monthly records to aggregate
-        has_monthly_records = fitness_service.check_yearly_monthly_records_exist(current_user_id, previous_year)
-        
-        # Check if yearly summary doesn't exist for previous year
-        if has_monthly_records and not fitness_service.check_yearly_summary_exists(current_user_id, previous_year):
-            
-            # Get Q1 months count for current year
-            q1_months_count = fitness_service.check_partial_q1_months_count(current_user_id, current_year)
-            
-            # CONDITION 1: Q1 is complete (3 months) - trigger aggregation
-            if q1_months_count == 3:
-                yearly_summary_data = fitness_service.aggregate_and_store_yearly_summary(
-                    current_user_id, previous_year
-                )
-                
-                if yearly_summary_data:
-                    monthly_records_deleted = yearly_summary_data['monthly_records_deleted']
-            
-            # CONDITION 2: Q1 is skipped (0 months) - trigger on first activity after Q1
-            elif q1_months_count == 0 and current_month >= 4:  # After Q1 (April onwards)
-                yearly_summary_data = fitness_service.aggregate_and_store_yearly_summary(
-                    current_user_id, previous_year
-                )
-                
-                if yearly_summary_data:
-                    monthly_records_deleted = yearly_summary_data['monthly_records_deleted']
-            
-            # CONDITION 3: Partial Q1 (1 month) - trigger on first activity after Q1
-            elif q1_months_count == 1 and current_month >= 4:  # After Q1 (April onwards)
-                yearly_summary_data = fitness_service.aggregate_and_store_yearly_summary(
-                    current_user_id, previous_year
-                )
-                
-                if yearly_summary_data:
-                    monthly_records_deleted = yearly_summary_data['monthly_records_deleted']
-            
-            # CONDITION 4: Partial Q1 (2 months) - trigger on first activity after Q1
-            elif q1_months_count == 2 and current_month >= 4:  # After Q1 (April onwards)
-                yearly_summary_data = fitness_service.aggregate_and_store_yearly_summary(
-                    current_user_id, previous_year
-                )
-                
-                if yearly_summary_data:
-                    monthly_records_deleted = yearly_summary_data['monthly_records_deleted']
-
-        #Get the stored daily record for response
-        daily_record = db.execute(text("""
-                                       SELECT id,
-                                              user_id, date, steps, distance_km, calories, active_minutes, created_at
-                                       FROM daily_activities
-                                       WHERE id = :record_id
-                                       """), {"record_id": daily_record_id}).fetchone()
-
-        daily_response = DailyActivityResponse(
-            id=daily_record[0],
-            user_id=daily_record[1],
-            activity_date=daily_record[2],
-            steps=daily_record[3],
-            distance_km=daily_record[4],
-            calories=daily_record[5],
-            active_minutes=daily_record[6],
-            created_at=daily_record[7].isoformat() if daily_record[7] else ""
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
         )
 
-        # Prepare response message
-        message_parts = []
-
-        if should_summarize and monthly_summary_data:
-            message_parts.append(
-                f"Previous month ({prev_year}-{prev_month:02d}) summarized: {monthly_summary_data['total_steps']} steps")
-            message_parts.append(f"Daily records deleted: {daily_records_deleted}")
-            message_parts.append(f"Old monthly records deleted: {old_monthly_records_deleted}")
-
-        if yearly_summary_data:
-            trigger_reason = ""
-            if q1_months_count == 3:
-                trigger_reason = " (Q1 complete)"
-            elif q1_months_count == 0:
-                trigger_reason = " (Q1 skipped - first post-Q1 activity)"
-            elif q1_months_count == 1:
-                trigger_reason = " (Q1 partial - 1 month present)"
-            elif q1_months_count == 2:
-                trigger_reason = " (Q1 partial - 2 months present)"
-            
-            message_parts.append(f"Year {previous_year} aggregated{trigger_reason}: {yearly_summary_data['total_steps']} steps")
-            message_parts.append(f"Monthly records deleted: {monthly_records_deleted}")
-
-        if not message_parts:
-            message = "Daily activity stored successfully."
-        else:
-            message = "Daily activity stored successfully. " + " ".join(message_parts) + "."
 
-        return MonthlySummaryResponse(
-            message=message,
-            daily_activity_stored=True,
-            monthly_summary_created=should_summarize and monthly_summary_data is not None,
-            daily_records_deleted=daily_records_deleted,
-            old_monthly_records_deleted=old_monthly_records_deleted,
-            monthly_data=monthly_summary_data,
-            yearly_summary_created=yearly_summary_data is not None,
-            yearly_data=yearly_summary_data
+#Store several days of activity in one request (e.g. after the app was offline)
+def store_daily_activities_batch(
+        data: DailyActivityBatchRequest,
+        current_user_id: int = Depends(get_current_user_id),
+        db: Session = Depends(get_db)
+):
+
+    for activity in data.activities:
+        validate_activity_date(activity.activity_date)
+
+    #Initialize fitness service
+    fitness_service = FitnessActivityService(db)
+
+    try:
+        # One multi-row upsert for all days
+        stored_count = fitness_service.bulk_upsert_daily_activities([
+            {
+                "user_id": current_user_id,
+                "date": activity.activity_date,
+                "steps": activity.steps,
+                "distance_km": activity.distance_km,
+                "calories": activity.calories,
+                "active_minutes": activity.active_minutes
+            }
+            for activity in data.activities
+        ])
+
+        # Evaluate rollups once per affected month, oldest first, as sequential syncs would
+        affected_months = sorted({(a.activity_date.year, a.activity_date.month) for a in data.activities})
+        rollup_status = None
+        for year, month in affected_months:
+            month_date = date(year, month, 1)
+            if fitness_service.is_rollup_due(current_user_id, month_date):
+                rollup_status = rollup_worker.enqueue(current_user_id, month_date, db=db)
+
+        return DailyActivityBatchResponse(
+            message=f"{stored_count} daily activities stored successfully.",
+            daily_activities_stored=stored_count,
+            rollup_status=rollup_status
         )
 
     except Exception as e:
@@ -195,34 +131,86 @@ def store_daily_activity(
         )
 
 
-#Get user daily activity
-def get_user_daily_activities(current_user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+#Get status of the background monthly/yearly rollup (stored in the database, so any worker can answer)
+def get_rollup_status(
+        current_user_id: int = Depends(get_current_user_id),
+        db: Session = Depends(get_db)
+):
+
+    return RollupStatusResponse(user_id=current_user_id, **rollup_worker.get_status(db, current_user_id))
+
+
+def daily_activities_etag(user_id: int, version: tuple, *params) -> str:
+    """Strong ETag for a page of daily activity: data version plus query parameters."""
+    raw = "|".join(str(part) for part in (user_id, *version, *params))
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+#Get user daily activity, newest first, one page at a time
+def get_user_daily_activities(
+        request: Request,
+        response: Response,
+        from_date: Optional[date] = Query(None, alias="from"),
+        to_date: Optional[date] = Query(None, alias="to"),
+        cursor: Optional[date] = Query(None, description="Value of the X-Next-Cursor header of the previous page"),
+        limit: int = Query(DEFAULT_DAILY_ACTIVITY_PAGE_SIZE, ge=1, le=MAX_DAILY_ACTIVITY_PAGE_SIZE),
+        current_user_id: int = Depends(get_current_user_id),
+        db: Session = Depends(get_db)
+):
+
+    fitness_service = FitnessActivityService(db)
 
     try:
-        # Get daily activities for the user (LINES 225-243)
-        activities = db.query(DailyActivity).filter(
-            DailyActivity.user_id == current_user_id
-        ).order_by(DailyActivity.date.desc()).all()
+        # Answer conditional requests before loading any rows
+        version = fitness_service.get_daily_activity_version(current_user_id)
+        etag = daily_activities_etag(current_user_id, version, from_date, to_date, cursor, limit)
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers={"ETag": etag})
+
+        # Fetch one extra row to know whether another page exists
+        rows = fitness_service.get_daily_activities_page(
+            current_user_id, from_date, to_date, cursor, limit + 1
+        )
+        if len(rows) > limit:
+            rows = rows[:limit]
+            response.headers["X-Next-Cursor"] = str(rows[-1][1])
+        response.headers["ETag"] = etag
 
         return [
             UserDailyActivityResponse(
-                id=activity.id,
-                user_id=activity.user_id,
-                date=activity.date,
-                steps=activity.steps,
-                distance_km=activity.distance_km,
-                calories=activity.calories,
-                active_minutes=activity.active_minutes,
-                # created_at=activity.created_at.isoformat(),
-                # updated_at=activity.updated_at.isoformat()
+                id=row[0],
+                user_id=current_user_id,
+                date=row[1],
+                steps=row[2],
+                distance_km=row[3],
+                calories=row[4],
+                active_minutes=row[5]
             )
-            for activity in activities
+            for row in rows
         ]
 
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+def build_weekly_data(totals: dict, weeks: list) -> List[WeeklyActivityData]:
+    """Turn bucketed totals into response rows; weeks without activity report zeros."""
+    weekly_data = []
+    for week_num, week_start, week_end in weeks:
+        total_steps, total_calories, total_distance, total_active_minutes = totals.get(week_num - 1, (0, 0, 0, 0))
+        weekly_data.append(WeeklyActivityData(
+            week_number=week_num,
+            start_date=week_start.isoformat(),
+            end_date=(week_end - timedelta(days=1)).isoformat(),
+            total_steps=total_steps or 0,
+            total_calories=total_calories or 0,
+            total_distance=total_distance or 0,
+            total_active_minutes=total_active_minutes or 0
+        ))
+    return weekly_data
+
+
 #Get user weekly data
 def get_weekly_analytics(
         year: int,
@@ -231,68 +219,42 @@ def get_weekly_analytics(
         db: Session = Depends(get_db)
 ):
 
+    if not 1 <= month <= 12:
+        raise HTTPException(status_code=400, detail="Month must be between 1 and 12")
 
-    # Verify user exists
-    user = db.query(User).filter(User.id == current_user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    # Get all activities for the month
-    activities = db.query(DailyActivity).filter(
-        and_(
-            DailyActivity.user_id == current_user_id,
-            extract('year', DailyActivity.date) == year,
-            extract('month', DailyActivity.date) == month
-        )
-    ).all()
-
-    # Group activities by week
-    weekly_data = []
-
-    for week_num in range(1, 5):  # 4 weeks per month
-        # Calculate week start and end dates
-        month_start = date(year, month, 1)
-
-        if week_num == 1:
-            week_start = month_start
-            week_end = date(year, month, min(7, calendar.monthrange(year, month)[1]))
-        elif week_num == 2:
-            week_start = date(year, month, 8)
-            week_end = date(year, month, min(14, calendar.monthrange(year, month)[1]))
-        elif week_num == 3:
-            week_start = date(year, month, 15)
-            week_end = date(year, month, min(21, calendar.monthrange(year, month)[1]))
-        else:  # week 4
-            week_start = date(year, month, 22)
-            week_end = date(year, month, calendar.monthrange(year, month)[1])
-
-        # Filter activities for this week
-        week_activities = [
-            activity for activity in activities
-            if week_start <= activity.date <= week_end
-        ]
-
-        # Calculate totals for the week
-        total_steps = sum(activity.steps for activity in week_activities)
-        total_calories = sum(activity.calories for activity in week_activities)
-        total_distance = sum(activity.distance_km for activity in week_activities)
-        total_active_minutes = sum(activity.active_minutes for activity in week_activities)
-
-        weekly_data.append(WeeklyActivityData(
-            week_number=week_num,
-            start_date=week_start.isoformat(),
-            end_date=week_end.isoformat(),
-            total_steps=total_steps,
-            total_calories=total_calories,
-            total_distance=total_distance,
-            total_active_minutes=total_active_minutes
-        ))
+    # Sum the month into its 4 weeks in one aggregate query (days 29-31 go to week 4)
+    weeks = month_week_ranges(year, month)
+    month_start, month_end = month_range(year, month)
+    totals = FitnessActivityService(db).get_weekly_totals(current_user_id, month_start, month_end, len(weeks))
 
     return WeeklyAnalyticsResponse(
         user_id=current_user_id,
         year=year,
         month=month,
-        weeks=weekly_data
+        weeks=build_weekly_data(totals, weeks)
+    )
+
+#Get user data for the last N ISO weeks (Monday to Sunday), current week included
+def get_weekly_range_analytics(
+        weeks: int = Query(12, ge=1, le=MAX_ANALYTICS_WEEKS),
+        current_user_id: int = Depends(get_current_user_id),
+        db: Session = Depends(get_db)
+):
+
+    today = date.today()
+    range_end = today - timedelta(days=today.weekday()) + timedelta(days=7)
+    range_start = range_end - timedelta(weeks=weeks)
+    week_ranges = [
+        (index + 1, range_start + timedelta(weeks=index), range_start + timedelta(weeks=index + 1))
+        for index in range(weeks)
+    ]
+    totals = FitnessActivityService(db).get_weekly_totals(current_user_id, range_start, range_end, weeks)
+
+    return WeeklyRangeAnalyticsResponse(
+        user_id=current_user_id,
+        start_date=range_start.isoformat(),
+        end_date=(range_end - timedelta(days=1)).isoformat(),
+        weeks=build_weekly_data(totals, week_ranges)
     )
 
  # Get user monthly activities data
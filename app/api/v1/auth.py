@@ -1,16 +1,20 @@
 from fastapi import Depends, HTTPException, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 import random
 from typing import Optional
-import bcrypt
 
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.models.user import User
 from app.models.refresh_token import RefreshToken
 from app.core.jwt_utils import create_access_token, create_refresh_token
-from app.core.auth_dependencies import get_current_user, get_current_user_id
+from app.core.auth_dependencies import get_current_user, get_current_user_id, get_current_principal
+from app.core.principal_cache import UserPrincipal, invalidate_user_principal
+from app.core.password_hasher import password_hasher
 
 from app.schemas.auth import (
     RegisterSchema, VerifyOTPSchema, LoginSchema, ResendOTPSchema,
@@ -26,23 +30,31 @@ image_service = ImageService()
 
 
 def hash_password(password: str) -> str:
-    # Convert password to bytes and truncate to 72 bytes
-    password_bytes = password.encode('utf-8')[:72]
-    # Generate salt and hash
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
+    # bcrypt runs on the bounded password hashing pool
+    return password_hasher.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
-        # Convert password to bytes and truncate to 72 bytes
-        password_bytes = plain_password.encode('utf-8')[:72]
-        hashed_bytes = hashed_password.encode('utf-8')
-        return bcrypt.checkpw(password_bytes, hashed_bytes)
+        return password_hasher.verify(plain_password, hashed_password)
+    except HTTPException:
+        # Hashing pool is saturated
+        raise
     except:
         # Fallback to plain text comparison for backward compatibility
         return plain_password == hashed_password
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    # Same as verify_password, without holding a thread while bcrypt runs
+    try:
+        return await password_hasher.verify_async(plain_password, hashed_password)
+    except HTTPException:
+        # Hashing pool is saturated
+        raise
+    except Exception:
+        # Fallback to plain text comparison for backward compatibility
+        # (asyncio.CancelledError, e.g. a client that disconnected, still propagates)
+        return plain_password == hashed_password
+
 
 # RESEND OTP
 def resend_otp(data: ResendOTPSchema, db: Session = Depends(get_db)):
@@ -78,19 +90,20 @@ def resend_otp(data: ResendOTPSchema, db: Session = Depends(get_db)):
 
 
 # REGISTER
-def register(user: RegisterSchema, db: Session = Depends(get_db)):
+async def register(user: RegisterSchema, db: AsyncSession = Depends(get_async_db)):
 
-    if db.query(User).filter(User.email == user.email).first():
+    existing = await db.execute(select(User.id).where(User.email == user.email))
+    if existing.first():
         raise HTTPException(status_code=400, detail="Email already registered")
 
     new_user = User(
         username=user.username,
         email=user.email,
-        password=hash_password(user.password)
+        password=await password_hasher.hash_async(user.password)
     )
 
     db.add(new_user)
-    db.commit()
+    await db.commit()
 
     # Log user registration activity
     log_activity(db, new_user.id, new_user.username, "signup", f"{new_user.username} signed up")
@@ -113,7 +126,7 @@ def register(user: RegisterSchema, db: Session = Depends(get_db)):
         last_used_at=datetime.utcnow()
     )
     db.add(db_refresh_token)
-    db.commit()
+    await db.commit()
 
     return {
         "message": "Registration successful",
@@ -215,26 +228,27 @@ def forgot_password_reset_password(data: ForgotPasswordResetSchema, db: Session
 
 
 # LOGIN
-def login(user: LoginSchema,
-          db: Session = Depends(get_db)
+async def login(user: LoginSchema,
+          db: AsyncSession = Depends(get_async_db)
           ):
-    # db: Session = get_db()
+    # Async so that waiting for bcrypt holds no threadpool thread
 
-    db_user = db.query(User).filter(User.email == user.email).first()
+    result = await db.execute(select(User).where(User.email == user.email))
+    db_user = result.scalars().first()
 
     if not db_user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     # Verify password using secure verification with backward compatibility
-    if not verify_password(user.password, db_user.password):
+    if not await verify_password_async(user.password, db_user.password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
   
     # Clean up any revoked refresh tokens for this admin before login
-    db.query(RefreshToken).filter(
+    await db.execute(delete(RefreshToken).where(
         RefreshToken.user_id == db_user.id,
         RefreshToken.is_revoked == True
-    ).delete()
-    db.commit()
+    ))
+    await db.commit()
 
     # Generate JWT tokens
     access_token = create_access_token(db_user.id)
@@ -254,7 +268,7 @@ def login(user: LoginSchema,
         last_used_at=datetime.utcnow()
     )
     db.add(db_refresh_token)
-    db.commit()
+    await db.commit()
 
     return {
         "access_token": access_token,
@@ -281,6 +295,7 @@ def update_profile(data: ProfileSetupSchema, current_user: User = Depends(get_cu
 
     db.commit()
     db.refresh(current_user)
+    invalidate_user_principal(current_user.id)
 
     # Log profile update activity
     log_activity(db, current_user.id, current_user.username, "profile_update", f"{current_user.username} updated profile")
@@ -298,7 +313,7 @@ def update_profile(data: ProfileSetupSchema, current_user: User = Depends(get_cu
     }
 
 #Get User Profile
-def get_profile(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_profile(current_user: UserPrincipal = Depends(get_current_principal), db: Session = Depends(get_db)):
 
     """
     Get profile for the authenticated user
@@ -319,12 +334,12 @@ def get_profile(current_user: User = Depends(get_current_user), db: Session = De
 async def upload_profile_image(
         profile_image: UploadFile = File(...),
         current_user_id: int = Depends(get_current_user_id),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
 
 
     # Get current user
-    user = db.query(User).filter(User.id == current_user_id).first()
+    user = await db.get(User, current_user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -337,12 +352,12 @@ async def upload_profile_image(
 
         # Delete old image only AFTER successful upload
         if old_image_path:
-            image_service.delete_old_profile_image(old_image_path)
+            await run_in_threadpool(image_service.delete_old_profile_image, old_image_path)
 
         # Update user's profile image in database
         user.profile_image = new_image_path
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        invalidate_user_principal(current_user_id)
 
         return {
             "success": True,
@@ -355,12 +370,12 @@ async def upload_profile_image(
         raise
     except Exception as e:
         # Rollback database changes on error
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to update profile image: {str(e)}")
 
 
-async def get_user_profile(
-        current_user: User = Depends(get_current_user),
+def get_user_profile(
+        current_user: UserPrincipal = Depends(get_current_principal),
         db: Session = Depends(get_db)
 ):
 
@@ -418,6 +433,7 @@ def change_password(
         # Hash and update the new password
         current_user.password = hash_password(data.new_password)
         db.commit()
+        invalidate_user_principal(current_user.id)
         
         # Log password change activity
         log_activity(db, current_user.id, current_user.username, "password_change", f"{current_user.username} changed password")
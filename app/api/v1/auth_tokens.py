@@ -5,8 +5,11 @@ from typing import Dict
 from datetime import datetime, timedelta
 
 from app.core.database import get_db
-from app.core.jwt_utils import create_access_token, create_refresh_token, decode_refresh_token, verify_refresh_token
-from app.core.auth_dependencies import get_current_user
+from app.core.jwt_utils import (
+    create_access_token, create_refresh_token, decode_refresh_token, verify_refresh_token, hash_refresh_token
+)
+from app.core.auth_dependencies import get_current_principal
+from app.core.principal_cache import UserPrincipal
 from app.models.user import User
 from app.models.refresh_token import RefreshToken
 
@@ -44,7 +47,7 @@ def refresh_token(
                 detail="Invalid refresh token"
             )
         
-        # Verify the token hash
+        # Verify the token hash (legacy bcrypt hashes are replaced by the rotation below)
         if not verify_refresh_token(request.refresh_token, db_token.token_hash):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -100,25 +103,30 @@ def logout(
         payload = decode_refresh_token(request.refresh_token)
         user_id = int(payload.get("sub"))
         
-        # Find and revoke the specific refresh token
-        db_tokens = db.query(RefreshToken).filter(
+        # Find the specific refresh token by its digest (indexed)
+        db_token = db.query(RefreshToken).filter(
+            RefreshToken.token_hash == hash_refresh_token(request.refresh_token),
             RefreshToken.user_id == user_id,
             RefreshToken.is_revoked == False
-        ).all()
+        ).first()
         
-        revoked_count = 0
-        for db_token in db_tokens:
-            if verify_refresh_token(request.refresh_token, db_token.token_hash):
-                db_token.revoke()
-                revoked_count += 1
-                break
+        if not db_token:
+            # Legacy bcrypt-hashed token: locate it by JTI and verify it once
+            legacy_token = db.query(RefreshToken).filter(
+                RefreshToken.user_id == user_id,
+                RefreshToken.jti == payload.get("jti"),
+                RefreshToken.is_revoked == False
+            ).first()
+            if legacy_token and verify_refresh_token(request.refresh_token, legacy_token.token_hash):
+                db_token = legacy_token
         
-        if revoked_count == 0:
+        if not db_token:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid refresh token"
             )
         
+        db_token.revoke()
         db.commit()
         return {"message": "Logout successful"}
         
@@ -132,7 +140,7 @@ def logout(
 
 
 def logout_all(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ) -> Dict:
     try:
@@ -4,7 +4,8 @@ from sqlalchemy import and_, or_
 from typing import List
 
 from app.core.database import get_db
-from app.core.auth_dependencies import get_current_user, get_current_user_id
+from app.core.auth_dependencies import get_current_user_id, get_current_principal
+from app.core.principal_cache import UserPrincipal
 from app.models import User
 from app.models.bmi_classification import BMIClassification
 from app.models.meal import Meal
@@ -13,7 +14,7 @@ from app.schemas.meal import MealResponse
 router = APIRouter()
 
 
-def get_meals_by_user_bmi(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)) -> List[MealResponse]:
+def get_meals_by_user_bmi(current_user: UserPrincipal = Depends(get_current_principal), db: Session = Depends(get_db)) -> List[MealResponse]:
 
     # Determine BMI value to use
     if current_user.bmi is None:
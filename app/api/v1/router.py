@@ -8,7 +8,8 @@ from .auth import (
 from .auth_tokens import refresh_token, logout, logout_all
 
 from .activities import (store_daily_activity, get_weekly_analytics,
-                         get_user_daily_activities, get_user_monthly_activities,get_user_yearly_activities)
+                         get_user_daily_activities, get_user_monthly_activities,get_user_yearly_activities,
+                         get_rollup_status, store_daily_activities_batch, get_weekly_range_analytics)
 from .meals import get_meals_by_user_bmi
 from .workouts import get_workouts_for_user
 from .subscription import (get_all_plans, get_plan_id, create_subscription_order, handle_razorpay_webhook,
@@ -45,10 +46,13 @@ router.post("/auth/logout-all")(logout_all)
 
 #Activity Endpoints
 router.post("/activity/daily")(store_daily_activity)  # New fitness endpoint with auto-summarization
+router.post("/activity/daily/batch")(store_daily_activities_batch)  # store many days in one request
 router.get("/activity/weekly")(get_weekly_analytics)  # get the user data monthly record week wise
+router.get("/activity/weekly/range")(get_weekly_range_analytics)  # get the user data of the last N weeks
 router.get("/activity/daily")(get_user_daily_activities)  # get user data of all month daywise
 router.get("/activity/monthly")(get_user_monthly_activities)  # New monthly activities endpoint  and get the user data monthly
 router.get("/activity/yearly")(get_user_yearly_activities)  # New yearly activities endpoint
+router.get("/activity/rollup-status")(get_rollup_status)  # status of the background monthly/yearly rollup
 
 # Meal endpoints
 router.get("/meals")(get_meals_by_user_bmi)
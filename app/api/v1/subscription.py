@@ -1,7 +1,7 @@
 from fastapi import Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.core.auth_dependencies import get_current_user
+from app.core.auth_dependencies import get_current_principal
 from app.services.razorpay_service import RazorpayService
 from app.schemas.payment import PaymentCreate, PaymentHistory, OrderResponse, SubscriptionRequest
 from app.services.payment_service import PaymentService
@@ -14,11 +14,11 @@ import json
 # Initialize Razorpay service
 razorpay_service = RazorpayService()
 
-def get_all_plans(db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+def get_all_plans(db: Session = Depends(get_db), current_user = Depends(get_current_principal)):
     plans = db.query(PlanModel).filter(PlanModel.is_active == True).all()
     return plans
 
-def get_plan_id(plan_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+def get_plan_id(plan_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_principal)):
     plan = db.query(PlanModel).filter(
     PlanModel.id == plan_id,
     PlanModel.is_active == True
@@ -29,7 +29,7 @@ def get_plan_id(plan_id: int, db: Session = Depends(get_db), current_user = Depe
 
 
 def create_subscription_order(request: SubscriptionRequest, db: Session = Depends(get_db),
-                              current_user=Depends(get_current_user)):
+                              current_user=Depends(get_current_principal)):
     """Create Razorpay order for subscription (user only)"""
     try:
         # ✅ Use authenticated user's ID instead of request.user_id
@@ -79,12 +79,19 @@ def create_subscription_order(request: SubscriptionRequest, db: Session = Depend
         raise HTTPException(status_code=400, detail=f"Order creation failed: {str(e)}")
 
 
+async def read_raw_body(request: Request) -> bytes:
+    """Read the raw request body so sync handlers can verify signatures over it."""
+    return await request.body()
+
+
 # @router.post("/webhooks/razorpay")
-async def handle_razorpay_webhook(request: Request, db: Session = Depends(get_db)):
+def handle_razorpay_webhook(
+        request: Request,
+        webhook_body: bytes = Depends(read_raw_body),
+        db: Session = Depends(get_db)
+):
     """Handle Razorpay webhook events"""
     try:
-        # Get webhook body
-        webhook_body = await request.body()
         webhook_data = json.loads(webhook_body.decode('utf-8'))
 
         # Get signature
@@ -127,12 +134,12 @@ async def handle_razorpay_webhook(request: Request, db: Session = Depends(get_db
 
 
 
-def get_payment_history(db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+def get_payment_history(db: Session = Depends(get_db), current_user = Depends(get_current_principal)):
     # Use JWT user ID - no user_id parameter needed
     return db.query(PaymentHistory).filter(PaymentHistory.user_id == current_user.id).all()
 
 
-def get_user_subscription(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+def get_user_subscription(db: Session = Depends(get_db), current_user=Depends(get_current_principal)):
     """Get subscription details for authenticated user (from JWT)"""
     # Get user's active subscription from user_subscriptions table
     subscription = db.query(Subscription).filter(
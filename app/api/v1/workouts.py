@@ -1,14 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.core.auth_dependencies import get_current_user
+from app.core.auth_dependencies import get_current_principal
+from app.core.principal_cache import UserPrincipal
 from app.models.workout import Workout
 from app.models.user import User
 from app.schemas.workout import WorkoutListResponse, WorkoutResponse
 
 router = APIRouter()
 
-def get_workouts_for_user(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_workouts_for_user(current_user: UserPrincipal = Depends(get_current_principal), db: Session = Depends(get_db)):
 
     # Validate user has required fields
     if not all([current_user.weight, current_user.weight_goal, current_user.activity_level]):
@@ -5,8 +5,9 @@ from typing import Optional
 
 from app.core.database import get_db
 from app.core.jwt_utils import decode_access_token
+from app.core.principal_cache import UserPrincipal, get_user_principal
 from app.models.user import User
-from app.models.refresh_token import RefreshToken
+from app.services.session_tracker import session_tracker
 
 security = HTTPBearer()
 
@@ -15,7 +16,10 @@ def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
-    """Get current authenticated user from JWT token."""
+    """
+    Get current authenticated user from JWT token and record the session as
+    used (written in batches by the session tracker).
+    """
     try:
         payload = decode_access_token(credentials.credentials)
         user_id = int(payload.get("sub"))
@@ -26,6 +30,8 @@ def get_current_user(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not found"
             )
+        
+        session_tracker.touch(user_id)
         return user
     except Exception:
         raise HTTPException(
@@ -35,23 +41,30 @@ def get_current_user(
         )
 
 
-def get_current_user_id(
+def get_current_principal(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
-) -> int:
-    """Get current authenticated user ID (lightweight version)."""
+) -> UserPrincipal:
+    """
+    Get a read-only snapshot of the current user, served from the principal
+    cache; only a cache miss queries the database. Use get_current_user when
+    the handler needs to modify the User row. Records the session as used,
+    like get_current_user.
+    """
     try:
         payload = decode_access_token(credentials.credentials)
         user_id = int(payload.get("sub"))
         
-        # Verify user exists without returning full object
-        user_exists = db.query(User).filter(User.id == user_id).first()
-        if not user_exists:
+        principal = get_user_principal(db, user_id, payload.get("iat", 0))
+        if not principal:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not found"
             )
-        return user_id
+        
+        # Mark the most recently used refresh token as used; coalesced in memory
+        session_tracker.touch(user_id)
+        return principal
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -60,39 +73,18 @@ def get_current_user_id(
         )
 
 
+def get_current_user_id(
+    principal: UserPrincipal = Depends(get_current_principal)
+) -> int:
+    """Get current authenticated user ID (lightweight version)."""
+    return principal.id
+
+
 def get_current_user_with_session_update(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    user: User = Depends(get_current_user)
 ) -> User:
-    """Get current user and auto-update refresh token usage."""
-    try:
-        payload = decode_access_token(credentials.credentials)
-        user_id = int(payload.get("sub"))
-        
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found"
-            )
-        
-        # Update the most recently used refresh token's last_used_at
-        most_recent_token = db.query(RefreshToken).filter(
-            RefreshToken.user_id == user_id,
-            RefreshToken.is_revoked == False
-        ).order_by(RefreshToken.last_used_at.desc()).first()
-        
-        if most_recent_token:
-            most_recent_token.update_last_used()
-            db.commit()
-        
-        return user
-    except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    """Get current user and record refresh token usage (get_current_user now does both)."""
+    return user
 
 
 def get_current_user_optional(
@@ -1,21 +1,160 @@
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Optional explicit URL for the async engine; derived from DATABASE_URL when unset
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
 
-engine = create_engine(
-    DATABASE_URL 
-)
+# Connection pool settings, per worker process (total = workers * (size + overflow))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Seconds a request waits for a free connection before failing
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Seconds after which a connection is replaced (stay below server/proxy idle timeouts)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Per-connection statement timeout in milliseconds, 0 disables it
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+# Connecting through PgBouncer in transaction pooling mode: no startup
+# parameters and no server-side prepared statements
+DB_PGBOUNCER_MODE = os.getenv("DB_PGBOUNCER_MODE", "false").lower() == "true"
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that counts how often a checkout had to wait for a connection
+    to be returned and how often that wait timed out (pool exhaustion).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        # Same condition QueuePool uses to decide whether to block on the queue
+        must_wait = self.checkedin() == 0 and self.overflow() >= self._max_overflow > -1
+        if not must_wait:
+            connection = super()._do_get()
+            with self._metrics_lock:
+                self.checkouts += 1
+            return connection
+
+        started = time.monotonic()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            with self._metrics_lock:
+                self.waits += 1
+                self.timeouts += 1
+                self.wait_seconds_total += time.monotonic() - started
+            raise
+        with self._metrics_lock:
+            self.checkouts += 1
+            self.waits += 1
+            self.wait_seconds_total += time.monotonic() - started
+        return connection
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """asyncio variant of InstrumentedQueuePool used by the async engine."""
+
+
+def is_postgres_url(url) -> bool:
+    return make_url(url).get_backend_name() == "postgresql"
+
+
+def async_database_url(url):
+    """Switch a sync database URL to its asyncio driver (asyncpg / aiosqlite)."""
+    url = make_url(url)
+    if url.get_backend_name() == "postgresql":
+        if "sslmode" in url.query:
+            # asyncpg takes libpq's sslmode values under the name "ssl"
+            url = url.difference_update_query(["sslmode"]).update_query_dict({"ssl": url.query["sslmode"]})
+        return url.set(drivername="postgresql+asyncpg")
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    return url
+
+
+def postgres_connect_args(driver: str) -> dict:
+    """Driver-specific connect arguments for the statement timeout and PgBouncer mode."""
+    connect_args = {}
+    if driver == "asyncpg":
+        if DB_PGBOUNCER_MODE:
+            # asyncpg prepares every statement, which PgBouncer cannot route
+            connect_args["statement_cache_size"] = 0
+            connect_args["prepared_statement_cache_size"] = 0
+        elif DB_STATEMENT_TIMEOUT_MS:
+            connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+    elif not DB_PGBOUNCER_MODE and DB_STATEMENT_TIMEOUT_MS:
+        # PgBouncer rejects the "options" startup parameter; set
+        # statement_timeout on the database role instead
+        connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    return connect_args
+
+
+def pool_kwargs() -> dict:
+    """Pool sizing and connection health settings shared by both engines."""
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+if is_postgres_url(DATABASE_URL):
+    engine = create_engine(
+        DATABASE_URL,
+        poolclass=InstrumentedQueuePool,
+        connect_args=postgres_connect_args(make_url(DATABASE_URL).get_driver_name()),
+        **pool_kwargs()
+    )
+else:
+    # Local development databases (SQLite) keep SQLAlchemy's default pooling
+    engine = create_engine(
+        DATABASE_URL
+    )
 SessionLocal = sessionmaker(
     bind=engine,
     autocommit=False,
     autoflush=False
 )
 
+# Async engine for handlers that await other I/O (uploads, WebSocket broadcasts)
+ASYNC_DATABASE_URL = ASYNC_DATABASE_URL or async_database_url(DATABASE_URL)
+if is_postgres_url(ASYNC_DATABASE_URL):
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        poolclass=InstrumentedAsyncQueuePool,
+        connect_args=postgres_connect_args(make_url(ASYNC_DATABASE_URL).get_driver_name()),
+        **pool_kwargs()
+    )
+else:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL
+    )
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
@@ -25,3 +164,32 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_pool_stats(pool=None) -> dict:
+    """Snapshot of connection pool usage for the /internal/pool endpoint."""
+    pool = pool if pool is not None else engine.pool
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "timeout_seconds": pool.timeout(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        with pool._metrics_lock:
+            stats.update({
+                "checkouts": pool.checkouts,
+                "waits": pool.waits,
+                "wait_seconds_total": round(pool.wait_seconds_total, 3),
+                "timeouts": pool.timeouts,
+            })
+    return stats
@@ -1,11 +1,17 @@
+import hashlib
+import hmac
 import os
+import time
 import uuid
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Tuple
 from jose import JWTError, jwt
-import bcrypt
+from fastapi import HTTPException
 from dotenv import load_dotenv
 
+from app.core.password_hasher import password_hasher
+from app.utils.cache import LRUCache
+
 load_dotenv()
 
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
@@ -16,10 +22,22 @@ REFRESH_TOKEN_EXPIRE_DAYS = 7
 if not JWT_SECRET_KEY:
     raise ValueError("JWT_SECRET_KEY environment variable is not set")
 
+# Server secret for refresh token digests; rotating it invalidates stored refresh tokens
+REFRESH_TOKEN_HASH_KEY = (os.getenv("REFRESH_TOKEN_HASH_KEY") or JWT_SECRET_KEY).encode('utf-8')
+# Refresh tokens stored before HMAC digests were introduced are bcrypt hashes
+LEGACY_REFRESH_TOKEN_HASH_PREFIX = "$2"
+
+# Verified access token payloads, kept until the token expires; clients resend
+# the same token on every request, so the signature is checked only once
+VERIFIED_TOKEN_CACHE_SIZE = int(os.getenv("VERIFIED_TOKEN_CACHE_SIZE", "10000"))
+# (realm, sha256(token)) -> (payload, exp)
+_verified_token_cache = LRUCache(maxsize=VERIFIED_TOKEN_CACHE_SIZE)
+
 
 def create_access_token(user_id: int) -> str:
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode = {"sub": str(user_id), "exp": expire, "type": "access"}
+    # iat keys the principal cache, so each token gets its own cached snapshot
+    to_encode = {"sub": str(user_id), "exp": expire, "iat": datetime.utcnow(), "type": "access"}
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
     return encoded_jwt
 
@@ -33,9 +51,30 @@ def create_refresh_token(user_id: int) -> Tuple[str, str]:
     return refresh_token, token_hash
 
 
+def decode_verified_token(token: str, secret_key: str, realm: str) -> Dict:
+    """
+    Decode a signed JWT, memoizing the verified payload until its exp.
+    `realm` separates tokens signed with different keys (users, admins).
+    Raises JWTError for invalid or expired tokens, which are never cached.
+    """
+    cache_key = (realm, hashlib.sha256(token.encode('utf-8')).digest())
+    entry = _verified_token_cache.get(cache_key)
+    if entry is not None:
+        payload, exp = entry
+        if time.time() < exp:
+            return dict(payload)
+        _verified_token_cache.pop(cache_key)
+
+    payload = jwt.decode(token, secret_key, algorithms=[JWT_ALGORITHM])
+    exp = payload.get("exp")
+    if exp:
+        _verified_token_cache.set(cache_key, (payload, exp))
+    return dict(payload)
+
+
 def decode_access_token(token: str) -> Dict:
     try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        payload = decode_verified_token(token, JWT_SECRET_KEY, "user")
         if payload.get("type") != "access":
             raise JWTError("Invalid token type")
         if is_token_expired(payload):
@@ -58,19 +97,24 @@ def decode_refresh_token(token: str) -> Dict:
 
 
 def hash_refresh_token(refresh_token: str) -> str:
-    salt = bcrypt.gensalt()
-    # Truncate refresh token to 72 bytes for bcrypt compatibility
-    refresh_token_bytes = refresh_token.encode('utf-8')[:72]
-    hashed = bcrypt.hashpw(refresh_token_bytes, salt)
-    return hashed.decode('utf-8')
+    # Refresh tokens are high-entropy signed JWTs, so a keyed digest is enough
+    # and can be looked up directly by index
+    return hmac.new(REFRESH_TOKEN_HASH_KEY, refresh_token.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def is_legacy_refresh_token_hash(stored_hash: str) -> bool:
+    return stored_hash.startswith(LEGACY_REFRESH_TOKEN_HASH_PREFIX)
 
 
 def verify_refresh_token(refresh_token: str, stored_hash: str) -> bool:
+    if not is_legacy_refresh_token_hash(stored_hash):
+        return hmac.compare_digest(hash_refresh_token(refresh_token), stored_hash)
     try:
-        # Truncate refresh token to 72 bytes for bcrypt compatibility
-        refresh_token_bytes = refresh_token.encode('utf-8')[:72]
-        stored_hash_bytes = stored_hash.encode('utf-8')
-        return bcrypt.checkpw(refresh_token_bytes, stored_hash_bytes)
+        # Legacy bcrypt hash (truncated to 72 bytes); callers replace it after one successful check
+        return password_hasher.verify(refresh_token, stored_hash)
+    except HTTPException:
+        # Hashing pool is saturated
+        raise
     except:
         return False
 
@@ -79,4 +123,5 @@ def is_token_expired(payload: Dict) -> bool:
     exp = payload.get("exp")
     if not exp:
         return True
-    return datetime.utcnow() > datetime.fromtimestamp(exp)
+    # exp is a UTC epoch timestamp
+    return time.time() > exp
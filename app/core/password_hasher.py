@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import bcrypt
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# bcrypt releases the GIL, so these threads use real cores; keep some for the API
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, min(4, (os.cpu_count() or 2) - 1)))))
+# Hash/verify calls allowed to wait for a worker before new ones are rejected with 503
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+# Blocking hash()/verify() calls (sync handlers) each hold a threadpool thread
+# while they wait; keep this well below the threadpool size (anyio: 40 threads)
+PASSWORD_HASH_MAX_BLOCKING_CALLERS = int(os.getenv("PASSWORD_HASH_MAX_BLOCKING_CALLERS", "8"))
+# bcrypt only uses the first 72 bytes of its input
+BCRYPT_MAX_BYTES = 72
+
+
+def _bcrypt_hash(secret: str) -> str:
+    return bcrypt.hashpw(secret.encode('utf-8')[:BCRYPT_MAX_BYTES], bcrypt.gensalt()).decode('utf-8')
+
+
+def _bcrypt_check(secret: str, hashed: str) -> bool:
+    return bcrypt.checkpw(secret.encode('utf-8')[:BCRYPT_MAX_BYTES], hashed.encode('utf-8'))
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a dedicated, size-limited thread
+    pool so bursts of logins cannot occupy every request thread and CPU core.
+
+    At most `max_workers` hashes run at once and at most `max_queue` more may
+    wait; beyond that callers get a 503 immediately instead of queueing.
+    Request handlers should await hash_async()/verify_async(), which hold no
+    thread while waiting. The blocking hash()/verify() are limited separately
+    to `max_blocking_callers` at once, so sync handlers waiting on bcrypt can
+    never take over the request threadpool.
+    Exceptions raised by bcrypt (e.g. an invalid stored hash) propagate to
+    the caller unchanged.
+    """
+
+    def __init__(self, max_workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE,
+                 max_blocking_callers: int = PASSWORD_HASH_MAX_BLOCKING_CALLERS):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_blocking_callers = max_blocking_callers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._blocking_slots = threading.BoundedSemaphore(max_blocking_callers)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._failed = 0
+        self._queue_seconds_total = 0.0
+        self._hash_seconds_total = 0.0
+        self._hash_seconds_max = 0.0
+
+    def hash(self, secret: str) -> str:
+        """Hash a password or token, blocking the calling thread until done."""
+        return self._wait(_bcrypt_hash, secret)
+
+    def verify(self, secret: str, hashed: str) -> bool:
+        """Check a password or token against a bcrypt hash, blocking the calling thread."""
+        return self._wait(_bcrypt_check, secret, hashed)
+
+    async def hash_async(self, secret: str) -> str:
+        """Hash without blocking the event loop."""
+        return await asyncio.wrap_future(self._submit(_bcrypt_hash, secret))
+
+    async def verify_async(self, secret: str, hashed: str) -> bool:
+        """Verify without blocking the event loop."""
+        return await asyncio.wrap_future(self._submit(_bcrypt_check, secret, hashed))
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "max_blocking_callers": self.max_blocking_callers,
+                "in_flight": self._in_flight,
+                "running": self._running,
+                "queued": self._in_flight - self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_queue_ms": round(self._queue_seconds_total / self._completed * 1000, 2) if self._completed else 0.0,
+                "avg_hash_ms": round(self._hash_seconds_total / self._completed * 1000, 2) if self._completed else 0.0,
+                "max_hash_ms": round(self._hash_seconds_max * 1000, 2),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def _wait(self, fn, *args):
+        if not self._blocking_slots.acquire(blocking=False):
+            self._reject("Too many blocking password hashing calls, rejecting request")
+        try:
+            return self._submit(fn, *args).result()
+        finally:
+            self._blocking_slots.release()
+
+    def _reject(self, reason: str):
+        with self._lock:
+            self._rejected += 1
+        logger.warning(reason)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again shortly",
+            headers={"Retry-After": "1"}
+        )
+
+    def _submit(self, fn, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            self._reject("Password hashing queue is full, rejecting request")
+
+        with self._lock:
+            self._in_flight += 1
+        submitted_at = time.monotonic()
+        try:
+            return self._executor.submit(self._run, fn, submitted_at, *args)
+        except Exception:
+            self._release()
+            raise
+
+    def _run(self, fn, submitted_at: float, *args):
+        started_at = time.monotonic()
+        with self._lock:
+            self._running += 1
+        failed = False
+        try:
+            return fn(*args)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.monotonic() - started_at
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._failed += failed
+                self._queue_seconds_total += started_at - submitted_at
+                self._hash_seconds_total += elapsed
+                self._hash_seconds_max = max(self._hash_seconds_max, elapsed)
+            self._release()
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+
+# Global instance for the application
+password_hasher = PasswordHasher()
@@ -0,0 +1,114 @@
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.admin import Admin
+from app.models.user import User
+from app.utils.cache import LRUCache
+
+load_dotenv()
+
+# Other worker processes only see profile changes and deletions after this TTL
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+# Kept short: deactivating an admin in the database takes effect after this TTL
+ADMIN_PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("ADMIN_PRINCIPAL_CACHE_TTL_SECONDS", "10"))
+ADMIN_PRINCIPAL_CACHE_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """Read-only snapshot of the authenticated user (no password or OTP)."""
+    id: int
+    username: str
+    email: str
+    is_verified: Optional[bool]
+    gender: Optional[str]
+    age: Optional[int]
+    weight: Optional[float]
+    height: Optional[float]
+    bmi: Optional[float]
+    weight_goal: Optional[float]
+    activity_level: Optional[str]
+    profile_image: Optional[str]
+
+
+@dataclass(frozen=True)
+class AdminPrincipal:
+    """Read-only snapshot of the authenticated admin (no password hash or OTP)."""
+    id: int
+    username: str
+    email: str
+    is_active: Optional[bool]
+    profile_image: Optional[str]
+    bio: Optional[str]
+
+
+PRINCIPAL_COLUMNS = [getattr(User, field) for field in UserPrincipal.__dataclass_fields__]
+ADMIN_PRINCIPAL_COLUMNS = [getattr(Admin, field) for field in AdminPrincipal.__dataclass_fields__]
+
+# (user_id, token iat) -> (UserPrincipal, cached_at)
+_principal_cache = LRUCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+# user_id -> time of the last invalidation; entries cached before it are stale
+_invalidated_at = LRUCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+# admin_id -> (AdminPrincipal, cached_at)
+_admin_principal_cache = LRUCache(maxsize=ADMIN_PRINCIPAL_CACHE_SIZE, ttl=ADMIN_PRINCIPAL_CACHE_TTL_SECONDS)
+_admin_invalidated_at = LRUCache(maxsize=ADMIN_PRINCIPAL_CACHE_SIZE, ttl=ADMIN_PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def get_user_principal(db: Session, user_id: int, issued_at: int = 0) -> Optional[UserPrincipal]:
+    """
+    Get the principal for a token of `user_id` issued at `issued_at`, loading
+    it from the database on a cache miss. Returns None if the user is gone.
+    """
+    cache_key = (user_id, issued_at)
+    entry = _principal_cache.get(cache_key)
+    if entry is not None:
+        principal, cached_at = entry
+        if cached_at > _invalidated_at.get(user_id, 0.0):
+            return principal
+
+    cached_at = time.monotonic()
+    row = db.execute(select(*PRINCIPAL_COLUMNS).where(User.id == user_id)).first()
+    if row is None:
+        return None
+
+    principal = UserPrincipal(*row)
+    _principal_cache.set(cache_key, (principal, cached_at))
+    return principal
+
+
+def invalidate_user_principal(user_id: int):
+    """Drop every cached principal of the user (after profile, password or account changes)."""
+    _invalidated_at.set(user_id, time.monotonic())
+
+
+def get_admin_principal(db: Session, admin_id: int) -> Optional[AdminPrincipal]:
+    """
+    Get the principal of `admin_id`, loading it from the database on a cache
+    miss. Returns None if the admin is gone.
+    """
+    entry = _admin_principal_cache.get(admin_id)
+    if entry is not None:
+        principal, cached_at = entry
+        if cached_at > _admin_invalidated_at.get(admin_id, 0.0):
+            return principal
+
+    cached_at = time.monotonic()
+    row = db.execute(select(*ADMIN_PRINCIPAL_COLUMNS).where(Admin.id == admin_id)).first()
+    if row is None:
+        return None
+
+    principal = AdminPrincipal(*row)
+    _admin_principal_cache.set(admin_id, (principal, cached_at))
+    return principal
+
+
+def invalidate_admin_principal(admin_id: int):
+    """Drop the cached principal of the admin (after profile, password or status changes)."""
+    _admin_invalidated_at.set(admin_id, time.monotonic())
@@ -1,11 +1,125 @@
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import List, Dict, Any
+from typing import Callable, Deque, List, Dict, Any, Hashable, Optional
+from collections import deque
+from dotenv import load_dotenv
 import json
 import asyncio
 import logging
+import os
+import time
+
+from app.core.websocket_pubsub import PubSubBackend, create_pubsub_backend
+
+load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# A client that does not accept a frame within this time is disconnected,
+# so one slow browser cannot hold up a broadcast
+WEBSOCKET_SEND_TIMEOUT_SECONDS = float(os.getenv("WEBSOCKET_SEND_TIMEOUT_SECONDS", "5"))
+# Messages buffered per connection before the queue full policy applies
+WEBSOCKET_SEND_QUEUE_SIZE = int(os.getenv("WEBSOCKET_SEND_QUEUE_SIZE", "100"))
+# What to do when a connection's queue is full: drop_oldest, drop_newest or disconnect
+WEBSOCKET_QUEUE_FULL_POLICY = os.getenv("WEBSOCKET_QUEUE_FULL_POLICY", "drop_oldest")
+# A connection whose queue stays full this long is disconnected
+WEBSOCKET_SLOW_CONSUMER_SECONDS = float(os.getenv("WEBSOCKET_SLOW_CONSUMER_SECONDS", "30"))
+
+QUEUE_FULL_POLICIES = ("drop_oldest", "drop_newest", "disconnect")
+
+# Events where only the latest queued message per data key matters
+# (e.g. repeated reads of the same notification)
+COALESCED_EVENT_KEYS = {
+    "NOTIFICATION_READ": "id",
+}
+
+
+class ConnectionSender:
+    """
+    Bounded outbound queue of one WebSocket connection, drained by a
+    dedicated writer task. Producers enqueue without awaiting the socket.
+    """
+
+    def __init__(self, connection_id: str, websocket: WebSocket, on_failed: Callable[[str], None]):
+        self.connection_id = connection_id
+        self.websocket = websocket
+        self._on_failed = on_failed
+        # Items are [coalesce_key, text] lists so a coalesced message is replaced in place
+        self._queue: Deque[list] = deque()
+        self._pending_keys: Dict[Hashable, list] = {}
+        self._ready = asyncio.Event()
+        self._full_since: Optional[float] = None
+        self.dropped = 0
+        self.coalesced = 0
+        self._task = asyncio.create_task(self._run())
+
+    def enqueue(self, text: str, coalesce_key: Hashable = None) -> bool:
+        """Queue a serialized message; returns False if the connection must be dropped."""
+        if coalesce_key is not None and coalesce_key in self._pending_keys:
+            self._pending_keys[coalesce_key][1] = text
+            self.coalesced += 1
+            return True
+
+        if len(self._queue) >= WEBSOCKET_SEND_QUEUE_SIZE:
+            now = time.monotonic()
+            if self._full_since is None:
+                self._full_since = now
+            if WEBSOCKET_QUEUE_FULL_POLICY == "disconnect" or now - self._full_since >= WEBSOCKET_SLOW_CONSUMER_SECONDS:
+                return False
+            self.dropped += 1
+            if WEBSOCKET_QUEUE_FULL_POLICY == "drop_newest":
+                return True
+            oldest_key, _ = self._queue.popleft()
+            self._pending_keys.pop(oldest_key, None)
+        else:
+            self._full_since = None
+
+        item = [coalesce_key, text]
+        self._queue.append(item)
+        if coalesce_key is not None:
+            self._pending_keys[coalesce_key] = item
+        self._ready.set()
+        return True
+
+    def queue_size(self) -> int:
+        return len(self._queue)
+
+    def close(self):
+        """Stop the writer task; queued messages are discarded."""
+        self._task.cancel()
+
+    async def _run(self):
+        while True:
+            await self._ready.wait()
+            while self._queue:
+                coalesce_key, text = self._queue.popleft()
+                self._pending_keys.pop(coalesce_key, None)
+                if not await _send_text(self.connection_id, self.websocket, text):
+                    await _close_quietly(self.websocket)
+                    self._on_failed(self.connection_id)
+                    return
+            self._full_since = None
+            self._ready.clear()
+
+
+async def _send_text(connection_id: str, websocket: WebSocket, text: str) -> bool:
+    """Send an already serialized message; returns False if the connection is broken or too slow."""
+    try:
+        await asyncio.wait_for(websocket.send_text(text), timeout=WEBSOCKET_SEND_TIMEOUT_SECONDS)
+        return True
+    except asyncio.TimeoutError:
+        logger.warning(f"WebSocket send to {connection_id} timed out")
+    except Exception as e:
+        logger.error(f"Error sending to {connection_id}: {e}")
+    return False
+
+
+async def _close_quietly(websocket: WebSocket):
+    # A timed out send may have left a partial frame; the socket is unusable
+    try:
+        await asyncio.wait_for(websocket.close(), timeout=WEBSOCKET_SEND_TIMEOUT_SECONDS)
+    except Exception:
+        pass
+
 
 class WebSocketManager:
     def __init__(self):
@@ -13,24 +127,44 @@ class WebSocketManager:
         self.active_connections: Dict[str, WebSocket] = {}
         # Store connection metadata (e.g., user info, connection time)
         self.connection_metadata: Dict[str, Dict[str, Any]] = {}
+        # Outbound queue and writer task per connection
+        self.senders: Dict[str, ConnectionSender] = {}
         self._connection_counter = 0
+        # Keep fire-and-forget tasks (socket closes) referenced until they finish
+        self._background_tasks = set()
+        # Cross-worker fan-out; events are delivered locally until start() runs
+        self.pubsub: Optional[PubSubBackend] = None
+        if WEBSOCKET_QUEUE_FULL_POLICY not in QUEUE_FULL_POLICIES:
+            raise ValueError(f"WEBSOCKET_QUEUE_FULL_POLICY must be one of {', '.join(QUEUE_FULL_POLICIES)}")
+
+    async def start(self, pubsub: Optional[PubSubBackend] = None):
+        """Start fanning broadcasts out through the configured pub/sub backend."""
+        pubsub = pubsub or create_pubsub_backend()
+        await pubsub.start(self._deliver_local)
+        self.pubsub = pubsub
+
+    async def stop(self):
+        if self.pubsub is not None:
+            pubsub, self.pubsub = self.pubsub, None
+            await pubsub.stop()
 
     async def connect(self, websocket: WebSocket, connection_id: str = None) -> str:
         """Accept and store a WebSocket connection."""
         await websocket.accept()
-        
+
         # Generate unique connection ID if not provided
         if connection_id is None:
             connection_id = f"conn_{self._connection_counter}"
             self._connection_counter += 1
-        
+
         # Store connection
         self.active_connections[connection_id] = websocket
         self.connection_metadata[connection_id] = {
             "connected_at": asyncio.get_event_loop().time(),
             "connection_id": connection_id
         }
-        
+        self.senders[connection_id] = ConnectionSender(connection_id, websocket, self.disconnect)
+
         logger.info(f"WebSocket connection established: {connection_id}")
         return connection_id
 
@@ -40,40 +174,61 @@ class WebSocketManager:
             del self.active_connections[connection_id]
         if connection_id in self.connection_metadata:
             del self.connection_metadata[connection_id]
-        logger.info(f"WebSocket connection disconnected: {connection_id}")
+        sender = self.senders.pop(connection_id, None)
+        if sender is not None:
+            sender.close()
+            logger.info(f"WebSocket connection disconnected: {connection_id}")
+
+    def _enqueue(self, connection_id: str, text: str, coalesce_key: Hashable = None):
+        sender = self.senders.get(connection_id)
+        if sender is None:
+            return
+        if not sender.enqueue(text, coalesce_key):
+            logger.warning(f"Disconnecting slow WebSocket consumer {connection_id}")
+            self.disconnect(connection_id)
+            task = asyncio.create_task(_close_quietly(sender.websocket))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
 
     async def send_personal_message(self, message: dict, connection_id: str):
-        """Send a message to a specific connection."""
-        if connection_id in self.active_connections:
-            websocket = self.active_connections[connection_id]
-            try:
-                await websocket.send_text(json.dumps(message))
-                logger.debug(f"Message sent to {connection_id}: {message}")
-            except Exception as e:
-                logger.error(f"Error sending message to {connection_id}: {e}")
-                # Remove broken connection
-                self.disconnect(connection_id)
+        """Queue a message for a specific connection."""
+        self._enqueue(connection_id, json.dumps(message))
 
     async def broadcast(self, message: dict):
-        """Broadcast a message to all active connections."""
-        if not self.active_connections:
-            logger.debug("No active connections to broadcast to")
+        """
+        Queue a message for all active connections of every worker. Returns
+        without waiting for any socket; each connection's writer task
+        delivers it.
+        """
+        text = json.dumps(message)
+        if self.pubsub is None:
+            await self._deliver_local(text)
             return
-        
-        # Create a list of connections to remove if they fail
-        failed_connections = []
-        
-        for connection_id, websocket in self.active_connections.items():
-            try:
-                await websocket.send_text(json.dumps(message))
-                logger.debug(f"Broadcast message sent to {connection_id}: {message}")
-            except Exception as e:
-                logger.error(f"Error broadcasting to {connection_id}: {e}")
-                failed_connections.append(connection_id)
-        
-        # Remove failed connections
-        for connection_id in failed_connections:
-            self.disconnect(connection_id)
+        try:
+            await self.pubsub.publish(text)
+        except Exception as e:
+            logger.error(f"WebSocket pub/sub publish failed, delivering to this worker only: {e}")
+            await self._deliver_local(text)
+
+    async def _deliver_local(self, text: str):
+        """Queue a serialized message for this worker's connections."""
+        if not self.senders:
+            return
+
+        # Repeated events for the same object collapse into the latest queued one
+        coalesce_key = None
+        event = None
+        try:
+            message = json.loads(text)
+            event = message.get("event")
+            if event in COALESCED_EVENT_KEYS:
+                coalesce_key = (event, message["data"].get(COALESCED_EVENT_KEYS[event]))
+        except (ValueError, AttributeError, KeyError):
+            pass
+
+        for connection_id in list(self.senders):
+            self._enqueue(connection_id, text, coalesce_key)
+        logger.debug("Event %s queued for %d connections", event, len(self.senders))
 
     async def broadcast_to_admins(self, message: dict):
         """Broadcast a message specifically to admin connections."""
@@ -84,41 +239,16 @@ class WebSocketManager:
     async def broadcast_event(self, event: str, data: dict):
         """
         Broadcast a standardized event to all connected clients.
-        
+
         Args:
             event: Event type (e.g., "NOTIFICATION_READ", "ALL_NOTIFICATIONS_READ")
             data: Event data payload
         """
-        if not self.active_connections:
-            logger.debug(f"No active connections to broadcast event: {event}")
-            return
-        
-        # Create standardized event message
-        event_message = {
+        # Create standardized event message, serialized once for all connections
+        await self.broadcast({
             "event": event,
             "data": data
-        }
-        
-        print(f"Broadcasting event: {event} to {len(self.active_connections)} connections")
-        logger.info(f"Broadcasting event: {event} to {len(self.active_connections)} connections")
-        
-        # Create a list of connections to remove if they fail
-        failed_connections = []
-        
-        for connection_id, websocket in self.active_connections.items():
-            try:
-                await websocket.send_text(json.dumps(event_message))
-                logger.debug(f"Event {event} sent to connection {connection_id}")
-            except Exception as e:
-                logger.error(f"Error broadcasting event {event} to {connection_id}: {e}")
-                failed_connections.append(connection_id)
-        
-        # Remove failed connections
-        for connection_id in failed_connections:
-            self.disconnect(connection_id)
-        
-        print(f"Event {event} broadcast completed. Failed connections: {len(failed_connections)}")
-        logger.info(f"Event {event} broadcast completed. Failed connections: {len(failed_connections)}")
+        })
 
     def get_connection_count(self) -> int:
         """Get the number of active connections."""
@@ -126,13 +256,17 @@ class WebSocketManager:
 
     def get_connection_info(self) -> List[Dict[str, Any]]:
         """Get information about all active connections."""
-        return [
-            {
+        info = []
+        for conn_id, metadata in self.connection_metadata.items():
+            sender = self.senders.get(conn_id)
+            info.append({
                 "connection_id": conn_id,
-                **metadata
-            }
-            for conn_id, metadata in self.connection_metadata.items()
-        ]
+                **metadata,
+                "queued_messages": sender.queue_size() if sender else 0,
+                "dropped_messages": sender.dropped if sender else 0,
+                "coalesced_messages": sender.coalesced if sender else 0
+            })
+        return info
 
 
 # Global instance for the application
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Optional
+
+import asyncpg
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from app.core.database import DATABASE_URL, async_engine
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# "memory" delivers events inside this process only (single worker, tests);
+# "postgres" fans them out to every worker through LISTEN/NOTIFY
+WEBSOCKET_PUBSUB_BACKEND = os.getenv("WEBSOCKET_PUBSUB_BACKEND", "memory")
+WEBSOCKET_PUBSUB_CHANNEL = os.getenv("WEBSOCKET_PUBSUB_CHANNEL", "admin_notifications")
+# LISTEN needs a session-level connection; point this at PostgreSQL directly
+# when DATABASE_URL goes through PgBouncer in transaction pooling mode
+WEBSOCKET_PUBSUB_DATABASE_URL = os.getenv("WEBSOCKET_PUBSUB_DATABASE_URL")
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+PG_NOTIFY_MAX_PAYLOAD_BYTES = 7999
+PUBSUB_RECONNECT_MAX_SECONDS = 30
+
+MessageHandler = Callable[[str], Awaitable[None]]
+
+
+class PubSubBackend:
+    """Delivers serialized WebSocket events to the handler of every worker process."""
+
+    async def start(self, handler: MessageHandler):
+        raise NotImplementedError
+
+    async def publish(self, message: str):
+        raise NotImplementedError
+
+    async def stop(self):
+        pass
+
+
+class InMemoryPubSub(PubSubBackend):
+    """Loops published events straight back to this process."""
+
+    def __init__(self):
+        self._handler: Optional[MessageHandler] = None
+
+    async def start(self, handler: MessageHandler):
+        self._handler = handler
+
+    async def publish(self, message: str):
+        if self._handler is not None:
+            await self._handler(message)
+
+
+class PostgresPubSub(PubSubBackend):
+    """
+    Fans events out with NOTIFY on a channel that every worker LISTENs on
+    (the publishing worker receives its own notifications too). Events
+    published while a worker's listener is reconnecting are not delivered
+    to that worker.
+    """
+
+    def __init__(self, database_url: str, channel: str = WEBSOCKET_PUBSUB_CHANNEL):
+        # asyncpg takes a plain libpq style DSN
+        self.dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.channel = channel
+        self._handler: Optional[MessageHandler] = None
+        self._task: Optional[asyncio.Task] = None
+        # Keep delivery tasks referenced until they finish
+        self._deliveries = set()
+
+    async def start(self, handler: MessageHandler):
+        self._handler = handler
+        self._task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def publish(self, message: str):
+        if len(message.encode("utf-8")) > PG_NOTIFY_MAX_PAYLOAD_BYTES:
+            logger.warning("WebSocket event too large for NOTIFY; delivering to this worker only")
+            await self._handler(message)
+            return
+        async with async_engine.begin() as conn:
+            await conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": message})
+
+    def _on_notification(self, connection, pid, channel, payload):
+        task = asyncio.create_task(self._handler(payload))
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+
+    async def _listen_forever(self):
+        backoff = 1
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(self.channel, self._on_notification)
+                logger.info(f"Listening for WebSocket events on channel {self.channel}")
+                backoff = 1
+                await lost.wait()
+                logger.warning("WebSocket pub/sub listener connection lost; reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"WebSocket pub/sub listener failed: {e}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, PUBSUB_RECONNECT_MAX_SECONDS)
+
+
+def create_pubsub_backend() -> PubSubBackend:
+    """Build the backend selected by WEBSOCKET_PUBSUB_BACKEND."""
+    if WEBSOCKET_PUBSUB_BACKEND == "memory":
+        return InMemoryPubSub()
+    if WEBSOCKET_PUBSUB_BACKEND == "postgres":
+        return PostgresPubSub(WEBSOCKET_PUBSUB_DATABASE_URL or DATABASE_URL)
+    raise ValueError("WEBSOCKET_PUBSUB_BACKEND must be 'memory' or 'postgres'")
@@ -1,16 +1,42 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from app.api.router import api_router
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.router import admin_router
 from app.api.websocket import router as websocket_router
+from app.api.internal import router as internal_router
 from app.core.database import engine, Base
 from app.models import *
+from app.services.rollup_worker import rollup_worker
+from app.services.session_tracker import session_tracker
+from app.core.websocket_manager import websocket_manager
+from app.services.activity_pipeline import activity_pipeline
+from app.services.notification_counters import notification_counters
+from app.core.password_hasher import password_hasher
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Fitness App API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background workers that run on the server's event loop
+    await rollup_worker.start()
+    await session_tracker.start()
+    await websocket_manager.start()
+    await activity_pipeline.start()
+    await notification_counters.start()
+    yield
+    await notification_counters.stop()
+    await activity_pipeline.stop()
+    await websocket_manager.stop()
+    await session_tracker.stop()
+    await rollup_worker.stop()
+    password_hasher.shutdown()
+
+
+app = FastAPI(title="Fitness App API", lifespan=lifespan)
 
 # Configure CORS for admin frontend
 app.add_middleware(
@@ -33,6 +59,7 @@ app.mount("/media", StaticFiles(directory="app/media"), name="media")
 # Include API routes
 app.include_router(api_router, prefix="/api")
 app.include_router(websocket_router, prefix="/ws")
+app.include_router(internal_router, prefix="/internal", tags=["internal"])
 
 @app.get("/")
 def root():
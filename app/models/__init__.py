@@ -3,5 +3,7 @@ from .activity import DailyActivity
 from .monthly_activity import UserMonthlyActivity
 from .yearly_activity import UserYearlyActivity
 from .user_activity_log import UserActivityLog
+from .rollup_state import UserRollupState, UserRollupOpenMonth, UserRollupStatus
+from .notification_counter import NotificationCounter
 
-__all__ = ["User", "DailyActivity", "UserMonthlyActivity", "UserYearlyActivity", "UserActivityLog"]
\ No newline at end of file
+__all__ = ["User", "DailyActivity", "UserMonthlyActivity", "UserYearlyActivity", "UserActivityLog", "UserRollupState", "UserRollupOpenMonth", "UserRollupStatus", "NotificationCounter"]
\ No newline at end of file
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+class NotificationCounter(Base):
+    """Unread activity_logs count per activity type, so the admin badge doesn't scan activity_logs"""
+    __tablename__ = "notification_counters"
+
+    activity_type = Column(String(50), primary_key=True)
+    unread_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<NotificationCounter(activity_type={self.activity_type}, unread_count={self.unread_count})>"
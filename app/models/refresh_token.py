@@ -9,7 +9,7 @@ class RefreshToken(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
-    token_hash = Column(String, nullable=False)
+    token_hash = Column(String, nullable=False, index=True)  # HMAC-SHA256 digest (bcrypt for legacy rows)
     jti = Column(String, nullable=False, unique=True, index=True)  # JWT ID for tracking
     expires_at = Column(DateTime, nullable=False)
     last_used_at = Column(DateTime, nullable=True)
@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, ForeignKey, JSON
+from datetime import datetime
+from app.core.database import Base
+
+class UserRollupState(Base):
+    """Per-user monthly rollup bookkeeping, so rollup checks don't scan daily_activities"""
+    __tablename__ = "user_rollup_state"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    last_rolled_year = Column(Integer, nullable=True)
+    last_rolled_month = Column(Integer, nullable=True)  # 1-12
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<UserRollupState(user_id={self.user_id}, last_rolled={self.last_rolled_year}-{self.last_rolled_month})>"
+
+
+class UserRollupOpenMonth(Base):
+    """A month with daily data that has not been rolled up yet; one row per (user, month)"""
+    __tablename__ = "user_rollup_open_months"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    month = Column(Integer, primary_key=True)  # YYYYMM, e.g. 202609
+
+    def __repr__(self):
+        return f"<UserRollupOpenMonth(user_id={self.user_id}, month={self.month})>"
+
+
+class UserRollupStatus(Base):
+    """Latest background rollup job status per user, shared by all worker processes"""
+    __tablename__ = "user_rollup_status"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    status = Column(String(20), nullable=False)  # queued, running, completed or failed
+    queued_at = Column(DateTime, nullable=True)
+    activity_date = Column(Date, nullable=True)  # of the latest queued job, to queue it again after a restart
+    completed_at = Column(DateTime, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<UserRollupStatus(user_id={self.user_id}, status={self.status})>"
@@ -1,8 +1,26 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Index
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Index, text
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 
+# Important activity types that should trigger admin notifications
+ADMIN_IMPORTANT_ACTIVITIES = {
+    "USER_REGISTERED",
+    "FAILED_LOGIN", 
+    "SUBSCRIPTION_PURCHASED",
+    "PROFILE_UPDATED",
+    "PASSWORD_CHANGED",
+    "ACCOUNT_DEACTIVATED",
+    "PAYMENT_FAILED",
+    "WORKOUT_COMPLETED",
+    "GOAL_ACHIEVED",
+    "SUSPICIOUS_ACTIVITY"
+}
+
+# SQL list of the types above for the partial index predicate (sorted so the DDL is stable)
+ADMIN_IMPORTANT_ACTIVITIES_SQL = ", ".join(f"'{activity_type}'" for activity_type in sorted(ADMIN_IMPORTANT_ACTIVITIES))
+
+
 class UserActivityLog(Base):
     __tablename__ = "activity_logs"
 
@@ -25,4 +43,11 @@ class UserActivityLog(Base):
         Index('idx_activity_logs_user_created', 'user_id', 'created_at'),
         Index('idx_activity_logs_is_read_created', 'is_read', 'created_at'),
         Index('idx_activity_logs_type_read_created', 'activity_type', 'is_read', 'created_at'),
+        # Partial index for the unread notification inbox (newest first, keyset paginated)
+        Index(
+            'idx_activity_logs_unread_admin_created',
+            'created_at', 'id',
+            postgresql_where=text(f"is_read = false AND activity_type IN ({ADMIN_IMPORTANT_ACTIVITIES_SQL})"),
+            sqlite_where=text(f"is_read = 0 AND activity_type IN ({ADMIN_IMPORTANT_ACTIVITIES_SQL})")
+        ),
     )
@@ -1,6 +1,14 @@
 from pydantic import BaseModel, Field
 from datetime import date
-from typing import Optional
+from typing import List, Optional
+
+# Maximum number of days accepted by one batch upload
+MAX_BATCH_ACTIVITY_DAYS = 100
+# Maximum number of weeks returned by GET /activity/weekly/range
+MAX_ANALYTICS_WEEKS = 52
+# Page size of GET /activity/daily
+DEFAULT_DAILY_ACTIVITY_PAGE_SIZE = 100
+MAX_DAILY_ACTIVITY_PAGE_SIZE = 366
 
 class DailyActivityRequest(BaseModel):
     activity_date: date = Field(..., description="Activity date in YYYY-MM-DD format")
@@ -10,6 +18,19 @@ class DailyActivityRequest(BaseModel):
     active_minutes: float = Field(..., ge=0.0, description="Active minutes")
 
 
+class DailyActivityBatchRequest(BaseModel):
+    activities: List[DailyActivityRequest] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_ACTIVITY_DAYS,
+        description="Daily activities to store, e.g. all days synced after an offline period"
+    )
+
+
+class DailyActivityBatchResponse(BaseModel):
+    message: str
+    daily_activities_stored: int
+    rollup_status: Optional[str] = None
+
+
 class DailyActivityResponse(BaseModel):
     id: int
     # user_id: int
@@ -32,6 +53,16 @@ class MonthlySummaryResponse(BaseModel):
     monthly_data: Optional[dict] = None
     yearly_summary_created: bool = False
     yearly_data: Optional[dict] = None
+    rollup_status: Optional[str] = None
+
+class RollupStatusResponse(BaseModel):
+    """Status of the background monthly/yearly rollup for a user"""
+    user_id: int
+    status: str  # idle, queued, running, completed or failed
+    queued_at: Optional[str] = None
+    completed_at: Optional[str] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
 
 class UserDailyActivityResponse(BaseModel):
     id: int
@@ -62,6 +93,12 @@ class WeeklyAnalyticsResponse(BaseModel):
     month: int
     weeks: list[WeeklyActivityData]
 
+class WeeklyRangeAnalyticsResponse(BaseModel):
+    user_id: int
+    start_date: str
+    end_date: str
+    weeks: list[WeeklyActivityData]
+
 class MonthlyActivityResponse(BaseModel):
     """Response schema for monthly activity"""
     id: int
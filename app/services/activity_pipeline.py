@@ -0,0 +1,269 @@
+import asyncio
+import logging
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Deque, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import insert
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from app.core.database import SessionLocal
+from app.models.user_activity_log import UserActivityLog
+from app.services.notification_counters import notification_counters
+from app.services.notification_service import notification_service, notification_stats_cache
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Events buffered in memory; beyond this emit() writes synchronously from
+# threads (backpressure) and drops the event on the event loop
+ACTIVITY_PIPELINE_MAX_PENDING = int(os.getenv("ACTIVITY_PIPELINE_MAX_PENDING", "10000"))
+# A flush happens once this many events are queued...
+ACTIVITY_PIPELINE_BATCH_SIZE = int(os.getenv("ACTIVITY_PIPELINE_BATCH_SIZE", "200"))
+# ...or this long after the first queued event, whichever comes first
+ACTIVITY_PIPELINE_FLUSH_INTERVAL_SECONDS = float(os.getenv("ACTIVITY_PIPELINE_FLUSH_INTERVAL_SECONDS", "0.2"))
+# Delay before retrying a failed flush (doubles up to the maximum)
+ACTIVITY_PIPELINE_RETRY_SECONDS = 1
+ACTIVITY_PIPELINE_RETRY_MAX_SECONDS = 30
+
+
+@dataclass(frozen=True)
+class ActivityEvent:
+    user_id: Optional[int]
+    username: str
+    activity_type: str
+    description: str
+    created_at: datetime
+    notify: bool = True
+
+
+class ActivityPipeline:
+    """
+    Takes activity events from request handlers without blocking them. A
+    consumer task on the server's event loop writes queued events to
+    activity_logs in batches (one multi-row INSERT ... RETURNING per flush)
+    and broadcasts the admin-important ones. A failed flush is retried once
+    and then written row by row; only events the database rejects are
+    dropped, and events that fail because the database is unreachable stay
+    queued and are retried.
+
+    Activity logging never fails or blocks the caller's request: emit()
+    doesn't raise, and on the event loop it never waits for the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Deque[ActivityEvent] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._accepting = False
+        self._dropped = 0
+
+    def emit(self, event: ActivityEvent):
+        """Queue an activity event. Safe to call from any thread; never raises."""
+        with self._lock:
+            accepting = self._accepting
+            queued = accepting and len(self._pending) < ACTIVITY_PIPELINE_MAX_PENDING
+            if queued:
+                self._pending.append(event)
+                wake = len(self._pending) == 1
+                batch_ready = len(self._pending) == ACTIVITY_PIPELINE_BATCH_SIZE
+        if not queued:
+            # Not running (scripts, shutdown) or too far behind: write it
+            # directly instead of queueing it; nothing is broadcast
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            if loop is None:
+                # A worker thread or script: writing inline is the backpressure
+                self._write_fallback(event)
+            elif accepting:
+                # Queue full on the event loop: shed the event rather than stall the loop
+                self._drop(event)
+            else:
+                loop.run_in_executor(None, self._write_fallback, event)
+            return
+        if wake:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        if batch_ready:
+            self._loop.call_soon_threadsafe(self._batch_ready.set)
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._task is not None,
+                "pending": len(self._pending),
+                "dropped": self._dropped,
+            }
+
+    def _write_fallback(self, event: ActivityEvent):
+        try:
+            self._write_batch([event])
+        except Exception as e:
+            logger.error(f"Failed to write activity event: {e}")
+            self._drop(event)
+
+    def _drop(self, event: ActivityEvent):
+        with self._lock:
+            self._dropped += 1
+        logger.warning(f"Dropped activity event {event.activity_type} for user {event.user_id}")
+
+    async def start(self):
+        """Start the consumer task on the running event loop."""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._batch_ready = asyncio.Event()
+        with self._lock:
+            self._accepting = True
+        self._task = asyncio.create_task(self._run())
+        logger.info("Activity pipeline started")
+
+    async def stop(self):
+        """Stop accepting events, write everything still queued and stop the consumer."""
+        if self._task is None:
+            return
+        with self._lock:
+            self._accepting = False
+        self._wakeup.set()
+        self._batch_ready.set()
+        await self._task
+        self._task = None
+        logger.info("Activity pipeline stopped")
+
+    def _take_batch(self) -> List[ActivityEvent]:
+        with self._lock:
+            count = min(len(self._pending), ACTIVITY_PIPELINE_BATCH_SIZE)
+            return [self._pending.popleft() for _ in range(count)]
+
+    def _requeue(self, batch: List[ActivityEvent]):
+        with self._lock:
+            self._pending.extendleft(reversed(batch))
+
+    async def _run(self):
+        retry_delay = ACTIVITY_PIPELINE_RETRY_SECONDS
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # Let a batch fill up, but not for longer than the flush interval
+            if self.pending_count() < ACTIVITY_PIPELINE_BATCH_SIZE and self._accepting:
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), timeout=ACTIVITY_PIPELINE_FLUSH_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+            self._batch_ready.clear()
+
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    break
+                unwritten = await self._process(batch)
+                if unwritten:
+                    with self._lock:
+                        stopping = not self._accepting
+                    if stopping:
+                        logger.error(f"Dropping {len(unwritten) + self.pending_count()} activity events at shutdown")
+                        return
+                    self._requeue(unwritten)
+                    await asyncio.sleep(retry_delay)
+                    retry_delay = min(retry_delay * 2, ACTIVITY_PIPELINE_RETRY_MAX_SECONDS)
+                    continue
+                retry_delay = ACTIVITY_PIPELINE_RETRY_SECONDS
+
+            with self._lock:
+                if not self._accepting and not self._pending:
+                    return
+
+    async def _process(self, batch: List[ActivityEvent]) -> List[ActivityEvent]:
+        """
+        Write a batch and broadcast it. Returns the events that could not be
+        written because the database is unavailable, to be retried later.
+        """
+        activity_logs, unwritten = await self._write_with_fallback(batch)
+
+        for activity_log in activity_logs:
+            # Skips activities that are not admin-important
+            await notification_service.send_notification_to_admins(activity_log)
+        return unwritten
+
+    async def _write_with_fallback(self, batch: List[ActivityEvent]) -> Tuple[List[UserActivityLog], List[ActivityEvent]]:
+        """
+        Write the batch, retrying it once; if it still fails, write it row by
+        row so one bad event cannot take the rest of the batch with it. Rows
+        rejected by the database are logged and dropped. Stops at the first
+        connection-level error and returns the events not yet written.
+        """
+        for attempt in (1, 2):
+            try:
+                return await asyncio.to_thread(self._write_batch, batch), []
+            except Exception as e:
+                logger.warning(f"Failed to write {len(batch)} activity events (attempt {attempt}): {e}")
+
+        activity_logs = []
+        for position, event in enumerate(batch):
+            try:
+                activity_logs.extend(await asyncio.to_thread(self._write_batch, [event]))
+            except (OperationalError, InterfaceError) as e:
+                logger.error(f"Database unavailable, retrying {len(batch) - position} activity events later: {e}")
+                return activity_logs, batch[position:]
+            except Exception as e:
+                logger.error(f"Dropping activity event {event!r}: {e}")
+                self._drop(event)
+        return activity_logs, []
+
+    def _write_batch(self, batch: List[ActivityEvent]) -> List[UserActivityLog]:
+        """
+        Insert the batch in one transaction with multi-row INSERT ... RETURNING
+        statements (one for events to notify about, one for the rest) and
+        bump the unread notification counters.
+        Returns the inserted rows to notify about, detached and in id order.
+        """
+        db = SessionLocal()
+        try:
+            notify_rows = []
+            for notify in (True, False):
+                params = [
+                    {
+                        "user_id": event.user_id,
+                        "username": event.username,
+                        "activity_type": event.activity_type,
+                        "description": event.description,
+                        "is_read": False,
+                        "created_at": event.created_at
+                    }
+                    for event in batch if event.notify == notify
+                ]
+                if not params:
+                    continue
+                # RETURNING every column makes the order of returned rows irrelevant
+                result = db.execute(insert(UserActivityLog).returning(*UserActivityLog.__table__.columns), params)
+                rows = result.mappings().all()
+                if notify:
+                    notify_rows = rows
+            notification_counters.increment(db, (event.activity_type for event in batch))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        notification_stats_cache.record_inserted(event.activity_type for event in batch)
+        notification_counters.invalidate()
+        return [UserActivityLog(**row) for row in sorted(notify_rows, key=lambda row: row["id"])]
+
+
+# Global instance for the application
+activity_pipeline = ActivityPipeline()
@@ -1,9 +1,57 @@
-from sqlalchemy import text
+from sqlalchemy import Date, bindparam, case, delete, func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta
-from typing import Optional, Tuple
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
 import calendar
 
+from app.models.activity import DailyActivity
+from app.models.rollup_state import UserRollupOpenMonth, UserRollupState, UserRollupStatus
+from app.utils.cache import LRUCache
+from app.utils.date_ranges import month_range
+
+# Rollup state is cached per process; the TTL bounds staleness across workers
+ROLLUP_STATE_CACHE_SIZE = 10000
+ROLLUP_STATE_CACHE_TTL_SECONDS = 300
+
+
+@dataclass(frozen=True)
+class RollupState:
+    """Months are YYYYMM ints, e.g. 202609 for September 2026."""
+    last_rolled_month: Optional[int]
+    open_months: FrozenSet[int]
+
+
+# Yearly rollup facts only change when a rollup runs; the TTL covers other workers
+YEARLY_FACTS_CACHE_TTL_SECONDS = 3600
+
+
+@dataclass(frozen=True)
+class YearlyRollupFacts:
+    """Everything needed to decide whether the previous year can be rolled up."""
+    has_previous_year_months: bool
+    previous_year_summarized: bool
+    q1_months_count: int  # distinct Q1 months of the current year with a monthly summary
+
+
+_rollup_state_cache = LRUCache(maxsize=ROLLUP_STATE_CACHE_SIZE, ttl=ROLLUP_STATE_CACHE_TTL_SECONDS)
+_yearly_facts_cache = LRUCache(maxsize=ROLLUP_STATE_CACHE_SIZE, ttl=YEARLY_FACTS_CACHE_TTL_SECONDS)
+
+
+def month_key(year: int, month: int) -> int:
+    return year * 100 + month
+
+
+def invalidate_rollup_state(user_id: int, years: Iterable[int] = ()):
+    """
+    Drop the cached rollup state of a user (e.g. after deleting the user),
+    together with the memoized yearly rollup facts for `years`.
+    """
+    _rollup_state_cache.pop(user_id)
+    for year in years:
+        _yearly_facts_cache.pop((user_id, year))
+
 
 class FitnessActivityService:
 
@@ -29,59 +77,350 @@ class FitnessActivityService:
 
         return result.scalar() > 0
 
+    def _insert(self, table):
+        """Return a dialect-specific INSERT construct that supports ON CONFLICT."""
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            return postgresql.insert(table)
+        if dialect == "sqlite":
+            return sqlite.insert(table)
+        raise NotImplementedError(f"Upsert is not supported for dialect '{dialect}'")
+
+    def _daily_activity_upsert(self, rows):
+        table = DailyActivity.__table__
+        stmt = self._insert(table).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.date],  # unique_user_date
+            set_={
+                "steps": stmt.excluded.steps,
+                "distance_km": stmt.excluded.distance_km,
+                "calories": stmt.excluded.calories,
+                "active_minutes": stmt.excluded.active_minutes,
+                "updated_at": datetime.utcnow(),
+            },
+        )
+
     def upsert_daily_activity(self, user_id: int, activity_date: date, steps: int,
                               distance_km: float, calories: float, active_minutes: float) -> int:
 
-        if self.check_daily_record_exists(user_id, activity_date):
-            # Update existing record
-            result = self.db.execute(text("""
-                                          UPDATE daily_activities
-                                          SET steps          = :steps,
-                                              distance_km    = :distance_km,
-                                              calories       = :calories,
-                                              active_minutes = :active_minutes
-                                          WHERE user_id = :user_id
-                                            AND date = :activity_date
-                                              RETURNING id
-                                          """), {
-                                         "user_id": user_id,
-                                         "activity_date": activity_date,
-                                         "steps": steps,
-                                         "distance_km": distance_km,
-                                         "calories": calories,
-                                         "active_minutes": active_minutes
-                                     })
+        # Single INSERT ... ON CONFLICT (user_id, date) DO UPDATE round trip
+        stmt = self._daily_activity_upsert({
+            "user_id": user_id,
+            "date": activity_date,
+            "steps": steps,
+            "distance_km": distance_km,
+            "calories": calories,
+            "active_minutes": active_minutes,
+        })
+
+        if self.db.get_bind().dialect.insert_returning:
+            record_id = self.db.execute(stmt.returning(DailyActivity.__table__.c.id)).scalar()
         else:
-            # Insert new record
-            result = self.db.execute(text("""
-                                          INSERT INTO daily_activities
-                                          (user_id, date, steps, distance_km, calories, active_minutes, created_at)
-                                          VALUES (:user_id, :activity_date, :steps, :distance_km, :calories,
-                                                  :active_minutes, NOW()) RETURNING id
-                                          """), {
-                                         "user_id": user_id,
-                                         "activity_date": activity_date,
-                                         "steps": steps,
-                                         "distance_km": distance_km,
-                                         "calories": calories,
-                                         "active_minutes": active_minutes
-                                     })
+            # Older SQLite builds (< 3.35) have no RETURNING; read the id back instead
+            self.db.execute(stmt)
+            record_id = self.db.execute(text("""
+                                             SELECT id
+                                             FROM daily_activities
+                                             WHERE user_id = :user_id AND date = :activity_date
+                                             """), {"user_id": user_id, "activity_date": activity_date}).scalar()
+
+        opened = self.note_open_months(user_id, [month_key(activity_date.year, activity_date.month)])
+        self.db.commit()
+        if opened:
+            invalidate_rollup_state(user_id)
+        return record_id
+
+    def bulk_upsert_daily_activities(self, activities: List[dict]) -> int:
+        """
+        Upsert many daily activity rows with one multi-row INSERT ... ON CONFLICT.
+
+        Each row needs user_id, date, steps, distance_km, calories and
+        active_minutes; rows may belong to different users. If the same
+        (user_id, date) appears more than once, the last row wins.
+        """
+        rows = {}
+        for activity in activities:
+            rows[(activity["user_id"], activity["date"])] = activity
+
+        if not rows:
+            return 0
+
+        self.db.execute(self._daily_activity_upsert(list(rows.values())))
+
+        months_by_user = {}
+        for user_id, activity_date in rows:
+            months_by_user.setdefault(user_id, set()).add(month_key(activity_date.year, activity_date.month))
+        opened_user_ids = [user_id for user_id, months in months_by_user.items()
+                           if self.note_open_months(user_id, months)]
 
         self.db.commit()
-        return result.scalar()
+        for user_id in opened_user_ids:
+            invalidate_rollup_state(user_id)
+        return len(rows)
+
+    # ROLLUP STATE
+
+    def get_rollup_state(self, user_id: int) -> RollupState:
+        """
+        Get the user's rollup state: the last month rolled up and the months that
+        still have daily data waiting for a rollup. Served from the in-process
+        cache when possible, otherwise from user_rollup_state and
+        user_rollup_open_months. The cached copy only guides rollup checks;
+        writes never persist it.
+        """
+        state = _rollup_state_cache.get(user_id)
+        if state is not None:
+            return state
+
+        row = self.db.execute(
+            select(UserRollupState.last_rolled_year, UserRollupState.last_rolled_month)
+            .where(UserRollupState.user_id == user_id)
+        ).fetchone()
+
+        if row is not None:
+            open_months = self.db.execute(
+                select(UserRollupOpenMonth.month).where(UserRollupOpenMonth.user_id == user_id)
+            ).scalars().all()
+            state = RollupState(
+                last_rolled_month=month_key(row[0], row[1]) if row[0] is not None else None,
+                open_months=frozenset(open_months)
+            )
+        else:
+            # First use for this user: derive the state from the activity tables once
+            state = self._build_rollup_state(user_id)
+            self._save_rollup_state(user_id, state)
+
+        _rollup_state_cache.set(user_id, state)
+        return state
+
+    def _build_rollup_state(self, user_id: int) -> RollupState:
+        daily_dates = self.db.execute(text("""
+                                           SELECT DISTINCT date
+                                           FROM daily_activities
+                                           WHERE user_id = :user_id
+                                           """).columns(date=Date), {"user_id": user_id}).scalars().all()
+        summarized_months = {
+            month_key(year, month)
+            for year, month in self.db.execute(text("""
+                                                    SELECT year, month
+                                                    FROM user_monthly_activity
+                                                    WHERE user_id = :user_id
+                                                    """), {"user_id": user_id}).fetchall()
+        }
+
+        open_months = {month_key(d.year, d.month) for d in daily_dates} - summarized_months
+        return RollupState(
+            last_rolled_month=max(summarized_months) if summarized_months else None,
+            open_months=frozenset(open_months)
+        )
+
+    def _save_rollup_state(self, user_id: int, state: RollupState):
+        # Only used for a freshly built state; concurrent builds write the same rows.
+        # Written as part of the caller's transaction; the caller commits
+        if state.last_rolled_month is not None:
+            self._note_rolled_month([user_id], state.last_rolled_month)
+        else:
+            stmt = self._insert(UserRollupState.__table__).values(user_id=user_id, updated_at=datetime.utcnow())
+            self.db.execute(stmt.on_conflict_do_nothing(index_elements=[UserRollupState.__table__.c.user_id]))
+        self._insert_open_months(user_id, state.open_months)
+
+    def _insert_open_months(self, user_id: int, months: Iterable[int]) -> int:
+        """Add open month rows, keeping existing ones; returns the number of rows added."""
+        rows = [{"user_id": user_id, "month": month} for month in sorted(set(months))]
+        if not rows:
+            return 0
+        table = UserRollupOpenMonth.__table__
+        result = self.db.execute(
+            self._insert(table).values(rows).on_conflict_do_nothing(index_elements=[table.c.user_id, table.c.month])
+        )
+        return result.rowcount
+
+    def _note_rolled_month(self, user_ids: Iterable[int], rolled: int):
+        """
+        Move last_rolled of each user forward to `rolled` (YYYYMM) with one
+        multi-row upsert, unless a later month was already rolled up.
+        """
+        table = UserRollupState.__table__
+        rolled_year, rolled_month = divmod(rolled, 100)
+        now = datetime.utcnow()
+        rows = [{"user_id": user_id, "last_rolled_year": rolled_year, "last_rolled_month": rolled_month,
+                 "updated_at": now} for user_id in sorted(set(user_ids))]
+        if not rows:
+            return
+        stmt = self._insert(table).values(rows)
+        # Compared in the database so concurrent rollups can't move it backwards
+        is_later = (stmt.excluded.last_rolled_year * 100 + stmt.excluded.last_rolled_month) > \
+            func.coalesce(table.c.last_rolled_year * 100 + table.c.last_rolled_month, 0)
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id],
+            set_={
+                "last_rolled_year": case((is_later, stmt.excluded.last_rolled_year), else_=table.c.last_rolled_year),
+                "last_rolled_month": case((is_later, stmt.excluded.last_rolled_month), else_=table.c.last_rolled_month),
+                "updated_at": stmt.excluded.updated_at,
+            }
+        ))
+
+    def note_open_months(self, user_id: int, months: Iterable[int]) -> bool:
+        """
+        Record that the user now has daily data in `months` (YYYYMM ints) with
+        INSERT ... ON CONFLICT DO NOTHING, so concurrent syncs can't drop each
+        other's months. Written as part of the caller's transaction. Returns
+        True if a month was new; the caller then calls invalidate_rollup_state()
+        after commit.
+        """
+        # Make sure the user's state exists (built from the activity tables on first use)
+        self.get_rollup_state(user_id)
+        return self._insert_open_months(user_id, months) > 0
+
+    def close_open_months(self, user_ids: List[int], year: int, month: int):
+        """
+        Remove a rolled-up month from the open months of users, with one DELETE
+        and one upsert for the whole batch. Written as part of the caller's
+        transaction; the caller calls invalidate_rollup_state() after commit.
+        """
+        if not user_ids:
+            return
+        # Users without a state row get it built first, or their other open months would be lost
+        with_state = set(self.db.execute(
+            select(UserRollupState.user_id).where(UserRollupState.user_id.in_(user_ids))
+        ).scalars())
+        for user_id in user_ids:
+            if user_id not in with_state:
+                self.get_rollup_state(user_id)
+
+        rolled = month_key(year, month)
+        self.db.execute(
+            delete(UserRollupOpenMonth)
+            .where(UserRollupOpenMonth.user_id.in_(user_ids), UserRollupOpenMonth.month == rolled)
+        )
+        self._note_rolled_month(user_ids, rolled)
+
+    # ROLLUP STATUS
+
+    def save_rollup_status(self, user_ids: Iterable[int], status: str, **fields):
+        """
+        Record the background rollup status of users in user_rollup_status,
+        leaving columns not given in `fields` unchanged. The caller commits.
+        """
+        table = UserRollupStatus.__table__
+        rows = [{"user_id": user_id, "status": status, "updated_at": datetime.utcnow(), **fields}
+                for user_id in user_ids]
+        if not rows:
+            return
+        stmt = self._insert(table).values(rows)
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id],
+            set_={column: stmt.excluded[column] for column in ["status", "updated_at", *fields]}
+        ))
+
+    def get_rollup_status(self, user_id: int) -> Optional[dict]:
+        """Latest background rollup status of the user, or None if no rollup was ever queued."""
+        row = self.db.execute(
+            select(UserRollupStatus.status, UserRollupStatus.queued_at, UserRollupStatus.completed_at,
+                   UserRollupStatus.result, UserRollupStatus.error)
+            .where(UserRollupStatus.user_id == user_id)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "status": row.status,
+            "queued_at": row.queued_at.isoformat() if row.queued_at else None,
+            "completed_at": row.completed_at.isoformat() if row.completed_at else None,
+            "result": row.result,
+            "error": row.error
+        }
+
+    def get_unfinished_rollups(self) -> List[Tuple[int, date]]:
+        """(user_id, activity_date) of rollup jobs recorded as queued or running."""
+        return [tuple(row) for row in self.db.execute(
+            select(UserRollupStatus.user_id, UserRollupStatus.activity_date)
+            .where(UserRollupStatus.status.in_(["queued", "running"]),
+                   UserRollupStatus.activity_date.is_not(None))
+        )]
 
     def get_monthly_daily_records(self, user_id: int, year: int, month: int) -> list:
+        month_start, month_end = month_range(year, month)
         result = self.db.execute(text("""
                                       SELECT steps, distance_km, calories, active_minutes
                                       FROM daily_activities
                                       WHERE user_id = :user_id
-                                        AND EXTRACT(YEAR FROM date) = :year
-                                        AND EXTRACT(MONTH FROM date) = :month
+                                        AND date >= :month_start
+                                        AND date < :month_end
                                       ORDER BY date
-                                      """), {"user_id": user_id, "year": year, "month": month})
+                                      """), {"user_id": user_id, "month_start": month_start, "month_end": month_end})
 
         return result.fetchall()
 
+    def get_daily_activities_page(self, user_id: int, from_date: Optional[date], to_date: Optional[date],
+                                  before: Optional[date], limit: int) -> list:
+        """
+        Get up to `limit` daily rows of a user, newest first, within the
+        inclusive [from_date, to_date] bounds and strictly older than the
+        `before` cursor. Keyset pagination on the (user_id, date) index.
+        """
+        conditions = ["user_id = :user_id"]
+        params = {"user_id": user_id, "limit": limit}
+        if from_date is not None:
+            conditions.append("date >= :from_date")
+            params["from_date"] = from_date
+        if to_date is not None:
+            conditions.append("date <= :to_date")
+            params["to_date"] = to_date
+        if before is not None:
+            conditions.append("date < :before")
+            params["before"] = before
+
+        result = self.db.execute(text(f"""
+                                      SELECT id, date, steps, distance_km, calories, active_minutes
+                                      FROM daily_activities
+                                      WHERE {" AND ".join(conditions)}
+                                      ORDER BY date DESC
+                                      LIMIT :limit
+                                      """), params)
+
+        return result.fetchall()
+
+    def get_daily_activity_version(self, user_id: int) -> tuple:
+        """
+        Get (latest updated_at, row count) of a user's daily activity. The count
+        changes when rollups delete rows, which leaves updated_at untouched.
+        """
+        result = self.db.execute(text("""
+                                      SELECT MAX(updated_at), COUNT(*)
+                                      FROM daily_activities
+                                      WHERE user_id = :user_id
+                                      """), {"user_id": user_id})
+
+        return tuple(result.fetchone())
+
+    def _days_since(self, start_param: str) -> str:
+        """SQL expression for the whole days between `date` and a bound date parameter."""
+        if self.db.get_bind().dialect.name == "sqlite":
+            return f"CAST(julianday(date) - julianday(:{start_param}) AS INTEGER)"
+        return f"(date - CAST(:{start_param} AS DATE))"
+
+    def get_weekly_totals(self, user_id: int, start: date, end: date, week_count: int) -> Dict[int, tuple]:
+        """
+        Sum daily activity of [start, end) into 7-day buckets counted from `start`.
+        Days past the last full bucket are clamped into bucket `week_count - 1`,
+        e.g. days 29-31 of a month fall into its 4th week.
+        Returns {bucket: (total_steps, total_calories, total_distance, total_active_minutes)}
+        for buckets that have activity.
+        """
+        bucket = f"{self._days_since('start')} / 7"
+        result = self.db.execute(text(f"""
+                                      SELECT CASE WHEN {bucket} > :last_bucket THEN :last_bucket ELSE {bucket} END AS week_bucket,
+                                             SUM(steps), SUM(calories), SUM(distance_km), SUM(active_minutes)
+                                      FROM daily_activities
+                                      WHERE user_id = :user_id
+                                        AND date >= :start
+                                        AND date < :end
+                                      GROUP BY week_bucket
+                                      """), {"user_id": user_id, "start": start, "end": end,
+                                             "last_bucket": week_count - 1})
+
+        return {row[0]: tuple(row[1:]) for row in result}
+
     def check_monthly_summary_exists(self, user_id: int, year: int, month: int) -> bool:
         result = self.db.execute(text("""
                                       SELECT COUNT(*)
@@ -115,13 +454,14 @@ class FitnessActivityService:
         return result.scalar()
 
     def delete_daily_records_for_month(self, user_id: int, year: int, month: int) -> int:
+        month_start, month_end = month_range(year, month)
         result = self.db.execute(text("""
                                       DELETE
                                       FROM daily_activities
                                       WHERE user_id = :user_id
-                                        AND EXTRACT(YEAR FROM date) = :year
-                                        AND EXTRACT(MONTH FROM date) = :month
-                                      """), {"user_id": user_id, "year": year, "month": month})
+                                        AND date >= :month_start
+                                        AND date < :month_end
+                                      """), {"user_id": user_id, "month_start": month_start, "month_end": month_end})
 
         self.db.commit()
         return result.rowcount
@@ -209,6 +549,63 @@ class FitnessActivityService:
         self.db.commit()
         return result.rowcount
 
+    def get_yearly_rollup_facts(self, user_id: int, current_year: int) -> YearlyRollupFacts:
+        """
+        Fetch the yearly rollup facts for `current_year` in one round trip.
+        Memoized per (user, year) until a rollup for the user changes them.
+        """
+        cache_key = (user_id, current_year)
+        facts = _yearly_facts_cache.get(cache_key)
+        if facts is not None:
+            return facts
+
+        row = self.db.execute(text("""
+                                   SELECT (SELECT COUNT(*)
+                                           FROM user_monthly_activity
+                                           WHERE user_id = :user_id AND year = :previous_year) AS previous_year_months,
+                                          (SELECT COUNT(*)
+                                           FROM user_yearly_activity
+                                           WHERE user_id = :user_id AND year = :previous_year) AS previous_year_summaries,
+                                          (SELECT COUNT(DISTINCT month)
+                                           FROM user_monthly_activity
+                                           WHERE user_id = :user_id AND year = :current_year
+                                             AND month IN (1, 2, 3)) AS q1_months_count
+                                   """), {"user_id": user_id, "current_year": current_year,
+                                          "previous_year": current_year - 1}).fetchone()
+
+        facts = YearlyRollupFacts(
+            has_previous_year_months=row[0] > 0,
+            previous_year_summarized=row[1] > 0,
+            q1_months_count=row[2]
+        )
+        _yearly_facts_cache.set(cache_key, facts)
+        return facts
+
+    def should_trigger_yearly_summary(self, user_id: int, activity_date: date) -> bool:
+        """
+        Decide whether the year before `activity_date` should be rolled up.
+        Dual-condition system: Q1 complete OR partial/skipped Q1.
+        """
+        facts = self.get_yearly_rollup_facts(user_id, activity_date.year)
+
+        # Previous year needs monthly records to aggregate and no yearly summary yet
+        if not facts.has_previous_year_months or facts.previous_year_summarized:
+            return False
+
+        # CONDITION 1: Q1 is complete (3 months)
+        # CONDITIONS 2-4: Q1 skipped or partial - trigger on first activity after Q1 (April onwards)
+        if facts.q1_months_count == 3 or activity_date.month >= 4:
+            # Store the Q1 count for the response message
+            self._q1_months_count = facts.q1_months_count
+            return True
+
+        return False
+
+    def is_rollup_due(self, user_id: int, activity_date: date) -> bool:
+        """Cheap check (normally served from cache) used before queueing a rollup."""
+        return self.should_trigger_monthly_summary(user_id, activity_date) or \
+            self.should_trigger_yearly_summary(user_id, activity_date)
+
     def should_trigger_yearly_aggregation(self, user_id: int, activity_date: date) -> bool:
 
         # Get the most recent monthly record for this user
@@ -238,146 +635,183 @@ class FitnessActivityService:
 
         return False
 
-    def aggregate_and_store_yearly_summary(self, user_id: int, year: int) -> Optional[dict]:
-
-        # Get all monthly records for the year
-        monthly_records = self.get_yearly_monthly_records(user_id, year)
-
-        # Always create yearly summary (even if no monthly records)
-        if not monthly_records:
-            # Create zero summary for years with no monthly data
-            yearly_id = self.create_yearly_summary(
-                user_id, year, 0, 0.0, 0.0, 0.0
-            )
+    def aggregate_and_store_yearly_summaries(self, user_ids: List[int], year: int) -> Dict[int, dict]:
+        """
+        Roll the monthly records of `year` up into yearly summaries for many users
+        at once. Totals are summed inside the database with one INSERT ... SELECT,
+        then the monthly records of that year are deleted.
 
-            return {
-                'yearly_id': yearly_id,
-                'total_steps': 0,
-                'total_distance_km': 0.0,
-                'total_calories': 0.0,
-                'total_active_minutes': 0.0,
+        Users without monthly records get a zero summary. Users that already have
+        a yearly summary for `year` are skipped and absent from the result.
+        """
+        if not user_ids:
+            return {}
+
+        inserted = self.db.execute(text("""
+                                        INSERT INTO user_yearly_activity
+                                        (user_id, year, total_steps, total_distance_km,
+                                         total_calories, total_active_minutes, created_at)
+                                        SELECT u.id, :year,
+                                               COALESCE(SUM(m.total_steps), 0),
+                                               COALESCE(SUM(m.total_distance_km), 0),
+                                               COALESCE(SUM(m.total_calories), 0),
+                                               COALESCE(SUM(m.total_active_minutes), 0),
+                                               CURRENT_TIMESTAMP
+                                        FROM users u
+                                                 LEFT JOIN user_monthly_activity m
+                                                           ON m.user_id = u.id AND m.year = :year
+                                        WHERE u.id IN :user_ids
+                                        GROUP BY u.id
+                                        ON CONFLICT (user_id, year) DO NOTHING
+                                        RETURNING user_id, id, total_steps, total_distance_km,
+                                                  total_calories, total_active_minutes
+                                        """).bindparams(bindparam("user_ids", expanding=True)),
+                                   {"user_ids": list(user_ids), "year": year}).fetchall()
+
+        summaries = {}
+        for row in inserted:
+            summaries[row[0]] = {
+                'yearly_id': row[1],
+                'total_steps': row[2],
+                'total_distance_km': row[3],
+                'total_calories': row[4],
+                'total_active_minutes': row[5],
                 'monthly_records_deleted': 0
             }
 
-        # Aggregate the data
-        total_steps = sum(record[0] for record in monthly_records)
-        total_distance = sum(record[1] for record in monthly_records)
-        total_calories = sum(record[2] for record in monthly_records)
-        total_active_minutes = sum(record[3] for record in monthly_records)
-
-        # Create yearly summary
-        yearly_id = self.create_yearly_summary(
-            user_id, year, total_steps,
-            total_distance, total_calories, total_active_minutes
-        )
-
-        # Delete monthly records for that year
-        deleted_count = self.delete_monthly_records_for_year(user_id, year)
+        if summaries:
+            # Delete monthly records for that year
+            deleted = self.db.execute(text("""
+                                           DELETE
+                                           FROM user_monthly_activity
+                                           WHERE user_id IN :user_ids AND year = :year
+                                           RETURNING user_id
+                                           """).bindparams(bindparam("user_ids", expanding=True)),
+                                      {"user_ids": list(summaries), "year": year}).fetchall()
+            for (user_id,) in deleted:
+                summaries[user_id]['monthly_records_deleted'] += 1
 
-        return {
-            'yearly_id': yearly_id,
-            'total_steps': total_steps,
-            'total_distance_km': total_distance,
-            'total_calories': total_calories,
-            'total_active_minutes': total_active_minutes,
-            'monthly_records_deleted': deleted_count
-        }
+        self.db.commit()
+        for user_id in user_ids:
+            _yearly_facts_cache.pop((user_id, year + 1))
+        return summaries
 
-    def aggregate_and_store_monthly_summary(self, user_id: int, year: int, month: int) -> Optional[dict]:
+    def aggregate_and_store_yearly_summary(self, user_id: int, year: int) -> Optional[dict]:
 
-        # Get all daily records for the month
-        daily_records = self.get_monthly_daily_records(user_id, year, month)
+        return self.aggregate_and_store_yearly_summaries([user_id], year).get(user_id)
 
-        # Always create monthly summary (even if no daily records)
-        if not daily_records:
-            # Create zero summary for months with no daily data
-            monthly_id = self.create_monthly_summary(
-                user_id, year, month, 0, 0.0, 0.0, 0.0
-            )
+    def aggregate_and_store_monthly_summaries(self, user_ids: List[int], year: int, month: int) -> Dict[int, dict]:
+        """
+        Roll the daily records of a month up into monthly summaries for many users
+        at once. Totals are summed inside the database with one INSERT ... SELECT,
+        then the daily records are deleted and the 12-month retention enforced.
 
-            return {
-                'monthly_id': monthly_id,
-                'total_steps': 0,
-                'total_distance_km': 0.0,
-                'total_calories': 0.0,
-                'total_active_minutes': 0.0,
+        Users without daily records get a zero summary. Users that already have
+        a summary for the month are skipped and absent from the result. The month
+        is removed from every user's open months in the rollup state.
+        """
+        if not user_ids:
+            return {}
+
+        month_start, month_end = month_range(year, month)
+        inserted = self.db.execute(text("""
+                                        INSERT INTO user_monthly_activity
+                                        (user_id, year, month, total_steps, total_distance_km,
+                                         total_calories, total_active_minutes, created_at)
+                                        SELECT u.id, :year, :month,
+                                               COALESCE(SUM(d.steps), 0),
+                                               COALESCE(SUM(d.distance_km), 0),
+                                               COALESCE(SUM(d.calories), 0),
+                                               COALESCE(SUM(d.active_minutes), 0),
+                                               CURRENT_TIMESTAMP
+                                        FROM users u
+                                                 LEFT JOIN daily_activities d
+                                                           ON d.user_id = u.id
+                                                               AND d.date >= :month_start
+                                                               AND d.date < :month_end
+                                        WHERE u.id IN :user_ids
+                                        GROUP BY u.id
+                                        ON CONFLICT (user_id, year, month) DO NOTHING
+                                        RETURNING user_id, id, total_steps, total_distance_km,
+                                                  total_calories, total_active_minutes
+                                        """).bindparams(bindparam("user_ids", expanding=True)),
+                                   {"user_ids": list(user_ids), "year": year, "month": month,
+                                    "month_start": month_start, "month_end": month_end}).fetchall()
+
+        summaries = {}
+        for row in inserted:
+            summaries[row[0]] = {
+                'monthly_id': row[1],
+                'total_steps': row[2],
+                'total_distance_km': row[3],
+                'total_calories': row[4],
+                'total_active_minutes': row[5],
                 'daily_records_deleted': 0,
                 'old_monthly_records_deleted': 0
             }
 
-        # Aggregate the data
-        total_steps = sum(record[0] for record in daily_records)
-        total_distance = sum(record[1] for record in daily_records)
-        total_calories = sum(record[2] for record in daily_records)
-        total_active_minutes = sum(record[3] for record in daily_records)
+        if summaries:
+            summarized_user_ids = list(summaries)
+
+            # Delete daily records for that month
+            deleted = self.db.execute(text("""
+                                           DELETE
+                                           FROM daily_activities
+                                           WHERE user_id IN :user_ids
+                                             AND date >= :month_start
+                                             AND date < :month_end
+                                           RETURNING user_id
+                                           """).bindparams(bindparam("user_ids", expanding=True)),
+                                      {"user_ids": summarized_user_ids,
+                                       "month_start": month_start, "month_end": month_end}).fetchall()
+            for (user_id,) in deleted:
+                summaries[user_id]['daily_records_deleted'] += 1
+
+            # Enforce 12-month retention (keep only 12 most recent per user)
+            deleted = self.db.execute(text("""
+                                           DELETE
+                                           FROM user_monthly_activity
+                                           WHERE id IN (SELECT id
+                                                        FROM (SELECT id,
+                                                                     ROW_NUMBER() OVER (
+                                                                         PARTITION BY user_id
+                                                                         ORDER BY year DESC, month DESC) AS position
+                                                              FROM user_monthly_activity
+                                                              WHERE user_id IN :user_ids) AS ranked
+                                                        WHERE position > 12)
+                                           RETURNING user_id
+                                           """).bindparams(bindparam("user_ids", expanding=True)),
+                                      {"user_ids": summarized_user_ids}).fetchall()
+            for (user_id,) in deleted:
+                summaries[user_id]['old_monthly_records_deleted'] += 1
+
+        # The month is closed for every user, including those that already had a summary
+        self.close_open_months(list(user_ids), year, month)
 
-        # Create monthly summary
-        monthly_id = self.create_monthly_summary(
-            user_id, year, month, total_steps,
-            total_distance, total_calories, total_active_minutes
-        )
-
-        # Delete daily records for that month
-        deleted_count = self.delete_daily_records_for_month(user_id, year, month)
+        self.db.commit()
+        for user_id in user_ids:
+            # New monthly records change the Q1 count of `year` and the
+            # previous-year records of `year + 1`
+            invalidate_rollup_state(user_id, years=[year, year + 1])
+        return summaries
 
-        # Enforce 12-month retention
-        old_records_deleted = self.enforce_12_month_retention(user_id)
+    def aggregate_and_store_monthly_summary(self, user_id: int, year: int, month: int) -> Optional[dict]:
 
-        return {
-            'monthly_id': monthly_id,
-            'total_steps': total_steps,
-            'total_distance_km': total_distance,
-            'total_calories': total_calories,
-            'total_active_minutes': total_active_minutes,
-            'daily_records_deleted': deleted_count,
-            'old_monthly_records_deleted': old_records_deleted
-        }
+        return self.aggregate_and_store_monthly_summaries([user_id], year, month).get(user_id)
 
     def should_trigger_monthly_summary(self, user_id: int, activity_date: date) -> bool:
 
-        # Get all months that have daily records for this user
-        result = self.db.execute(text("""
-                                      SELECT DISTINCT EXTRACT(YEAR FROM date) as year, 
-                   EXTRACT(MONTH FROM date) as month
-                                      FROM daily_activities
-                                      WHERE user_id = :user_id
-                                      ORDER BY year DESC, month DESC
-                                      """), {"user_id": user_id})
-
-        months_with_data = result.fetchall()
-
-        if not months_with_data:
-            return False
-
-        # Get current month from the activity being inserted
-        current_year = activity_date.year
-        current_month = activity_date.month
-
-        # Find the most recent month with data (excluding current month)
-        most_recent_year = None
-        most_recent_month = None
-
-        for year, month in months_with_data:
-            year = int(year)
-            month = int(month)
-
-            # Skip current month
-            if year == current_year and month == current_month:
-                continue
-
-            # Find the most recent month
-            if most_recent_year is None or (year > most_recent_year) or \
-                    (year == most_recent_year and month > most_recent_month):
-                most_recent_year = year
-                most_recent_month = month
+        # Most recent month before the current one that still has daily data
+        # waiting for a rollup. Later months are never rolled up from here, so a
+        # late sync of an older day can't summarize the current month.
+        current_month = month_key(activity_date.year, activity_date.month)
+        previous_open_months = [m for m in self.get_rollup_state(user_id).open_months if m < current_month]
 
         # If no previous month data, no aggregation needed
-        if most_recent_year is None:
+        if not previous_open_months:
             return False
 
-        # Check if summary exists for the most recent month
-        if self.check_monthly_summary_exists(user_id, most_recent_year, most_recent_month):
-            return False
+        most_recent_year, most_recent_month = divmod(max(previous_open_months), 100)
 
         # Store the month to be aggregated for later use
         self._month_to_aggregate_year = most_recent_year
@@ -449,4 +883,62 @@ class FitnessActivityService:
             ORDER BY year DESC
         """), {"user_id": user_id})
         
-        return result.fetchall()
\ No newline at end of file
+        return result.fetchall()
+
+    def run_rollups(self, user_id: int, activity_date: date) -> dict:
+        """
+        Run the monthly and yearly rollups that a daily activity on
+        `activity_date` may have made due. Called by the rollup worker.
+        """
+        result = {
+            "monthly_summary_created": False,
+            "monthly_data": None,
+            "daily_records_deleted": 0,
+            "old_monthly_records_deleted": 0,
+            "yearly_summary_created": False,
+            "yearly_data": None,
+            "messages": []
+        }
+
+        # Read the rollup state fresh; another worker process may have changed it
+        invalidate_rollup_state(user_id, years=[activity_date.year])
+
+        # Monthly summarization of the most recent previous month
+        if self.should_trigger_monthly_summary(user_id, activity_date):
+            prev_year = self._month_to_aggregate_year
+            prev_month = self._month_to_aggregate_month
+
+            monthly_summary_data = self.aggregate_and_store_monthly_summary(user_id, prev_year, prev_month)
+
+            if monthly_summary_data:
+                result["monthly_summary_created"] = True
+                result["monthly_data"] = monthly_summary_data
+                result["daily_records_deleted"] = monthly_summary_data['daily_records_deleted']
+                result["old_monthly_records_deleted"] = monthly_summary_data['old_monthly_records_deleted']
+                result["messages"].append(
+                    f"Previous month ({prev_year}-{prev_month:02d}) summarized: {monthly_summary_data['total_steps']} steps")
+                result["messages"].append(f"Daily records deleted: {result['daily_records_deleted']}")
+                result["messages"].append(f"Old monthly records deleted: {result['old_monthly_records_deleted']}")
+
+        # Yearly summarization of the previous year
+        previous_year = activity_date.year - 1
+        if self.should_trigger_yearly_summary(user_id, activity_date):
+            q1_months_count = self._q1_months_count
+            yearly_summary_data = self.aggregate_and_store_yearly_summary(user_id, previous_year)
+
+            if yearly_summary_data:
+                trigger_reason = {
+                    3: " (Q1 complete)",
+                    0: " (Q1 skipped - first post-Q1 activity)",
+                    1: " (Q1 partial - 1 month present)",
+                    2: " (Q1 partial - 2 months present)"
+                }[q1_months_count]
+
+                result["yearly_summary_created"] = True
+                result["yearly_data"] = yearly_summary_data
+                result["messages"].append(
+                    f"Year {previous_year} aggregated{trigger_reason}: {yearly_summary_data['total_steps']} steps")
+                result["messages"].append(
+                    f"Monthly records deleted: {yearly_summary_data['monthly_records_deleted']}")
+
+        return result
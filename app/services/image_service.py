@@ -2,6 +2,7 @@ import os
 import uuid
 from typing import Optional
 from fastapi import UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from PIL import Image
 import cloudinary
 import cloudinary.uploader
@@ -67,7 +68,8 @@ class ImageService:
             await file.seek(0)
 
             # Upload to Cloudinary (no overwrite to create new image)
-            upload_result = cloudinary.uploader.upload(
+            upload_result = await run_in_threadpool(
+                cloudinary.uploader.upload,
                 file.file,
                 public_id=public_id,
                 folder=self.upload_folder,
@@ -149,7 +151,8 @@ class AdminImageService:
             await file.seek(0)
 
             # Upload to Cloudinary (no overwrite to create new image)
-            upload_result = cloudinary.uploader.upload(
+            upload_result = await run_in_threadpool(
+                cloudinary.uploader.upload,
                 file.file,
                 public_id=public_id,
                 folder=self.upload_folder,
@@ -3,6 +3,7 @@ import uuid
 import time
 from typing import Optional
 from fastapi import UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from PIL import Image
 import cloudinary
 import cloudinary.uploader
@@ -85,7 +86,8 @@ class MealImageService:
                 raise HTTPException(status_code=400, detail="Invalid image file")
 
             # Upload to Cloudinary
-            upload_result = cloudinary.uploader.upload(
+            upload_result = await run_in_threadpool(
+                cloudinary.uploader.upload,
                 img_bytes,
                 public_id=public_id,
                 folder=self.upload_folder,
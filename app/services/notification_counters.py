@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Seconds between recounts of notification_counters from activity_logs
+NOTIFICATION_COUNTER_RECONCILE_SECONDS = float(os.getenv("NOTIFICATION_COUNTER_RECONCILE_SECONDS", "300"))
+# Seconds a worker serves unread counts from memory (changes made by other workers show up after this)
+NOTIFICATION_COUNTER_CACHE_TTL_SECONDS = float(os.getenv("NOTIFICATION_COUNTER_CACHE_TTL_SECONDS", "5"))
+
+INCREMENT_SQL = text("""
+    INSERT INTO notification_counters (activity_type, unread_count, updated_at)
+    VALUES (:activity_type, :count, :now)
+    ON CONFLICT (activity_type) DO UPDATE
+    SET unread_count = notification_counters.unread_count + excluded.unread_count,
+        updated_at = excluded.updated_at
+""")
+
+DECREMENT_SQL = text("""
+    UPDATE notification_counters
+    SET unread_count = CASE WHEN unread_count > :count THEN unread_count - :count ELSE 0 END,
+        updated_at = :now
+    WHERE activity_type = :activity_type
+""")
+
+# Actual unread count minus the counter per activity type (including types
+# with logs but no counter row), both read from one statement snapshot
+RECONCILE_DELTAS_SQL = text("""
+    SELECT activity_type, SUM(unread) - SUM(counted) AS delta
+    FROM (
+        SELECT activity_type, COUNT(*) AS unread, 0 AS counted
+        FROM activity_logs WHERE is_read = false
+        GROUP BY activity_type
+        UNION ALL
+        SELECT activity_type, 0, unread_count FROM notification_counters
+    ) AS counts
+    GROUP BY activity_type
+""")
+
+
+class NotificationCounters:
+    """
+    Unread notification counts per activity type, kept in the
+    notification_counters table: incremented when activity logs are
+    inserted, decremented when they are marked read (in the same
+    transaction), and periodically recounted to correct any drift. Reads
+    are served from a short-lived in-memory copy of the table.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache: Optional[Dict[str, int]] = None
+        self._loaded_at = 0.0
+        # Bumped on every local change so a load racing with it is not cached
+        self._version = 0
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    def increment(self, db: Session, activity_types: Iterable[str]):
+        """Count inserted (unread) activity logs; the caller commits, then calls invalidate()."""
+        params = [
+            {"activity_type": activity_type, "count": count, "now": datetime.utcnow()}
+            for activity_type, count in Counter(activity_types).items()
+        ]
+        if params:
+            db.execute(INCREMENT_SQL, params)
+
+    async def decrement(self, db: AsyncSession, counts: Dict[str, int]):
+        """Uncount activity logs marked read; the caller commits, then calls invalidate()."""
+        params = [
+            {"activity_type": activity_type, "count": count, "now": datetime.utcnow()}
+            for activity_type, count in counts.items() if count
+        ]
+        if params:
+            await db.execute(DECREMENT_SQL, params)
+
+    def invalidate(self):
+        """Drop the in-memory counts after a committed change."""
+        with self._lock:
+            self._version += 1
+            self._cache = None
+
+    def get_unread_counts(self, db: Session) -> Dict[str, int]:
+        """Unread counts by activity type."""
+        with self._lock:
+            if self._cache is not None and time.monotonic() - self._loaded_at < NOTIFICATION_COUNTER_CACHE_TTL_SECONDS:
+                return dict(self._cache)
+            version = self._version
+
+        loaded_at = time.monotonic()
+        rows = db.execute(text("SELECT activity_type, unread_count FROM notification_counters")).all()
+        counts = {activity_type: unread_count for activity_type, unread_count in rows}
+
+        with self._lock:
+            if version == self._version:
+                self._cache = counts
+                self._loaded_at = loaded_at
+        return dict(counts)
+
+    def get_unread_count(self, db: Session, activity_types: Iterable[str]) -> int:
+        """Total unread count over the given activity types."""
+        counts = self.get_unread_counts(db)
+        return sum(counts.get(activity_type, 0) for activity_type in activity_types)
+
+    def reconcile(self):
+        """
+        Recount every counter from activity_logs without losing increments
+        and decrements that commit while it runs.
+        """
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            # Applied relative to the current value: an increment or decrement
+            # committed after the snapshot is in neither side of a delta, so it
+            # is kept. Setting the snapshot's count outright would overwrite it.
+            params = [
+                {"activity_type": activity_type, "count": delta, "now": now}
+                for activity_type, delta in self._unread_deltas(db).items() if delta
+            ]
+            if params:
+                db.execute(INCREMENT_SQL, params)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        self.invalidate()
+
+    def _unread_deltas(self, db: Session) -> Dict[str, int]:
+        """How far each counter is behind the actual unread count."""
+        return {activity_type: delta for activity_type, delta in db.execute(RECONCILE_DELTAS_SQL)}
+
+    async def start(self):
+        """Start periodic reconciliation (the first run seeds the table)."""
+        if self._task is not None:
+            return
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Notification counter reconciliation started")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+        logger.info("Notification counter reconciliation stopped")
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.to_thread(self.reconcile)
+            except Exception as e:
+                logger.error(f"Notification counter reconciliation failed: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=NOTIFICATION_COUNTER_RECONCILE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+
+# Global instance for the application
+notification_counters = NotificationCounters()
@@ -1,29 +1,80 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from app.models.user_activity_log import UserActivityLog
+from sqlalchemy import func
+from app.models.user_activity_log import UserActivityLog, ADMIN_IMPORTANT_ACTIVITIES
 from app.core.websocket_manager import websocket_manager
 from app.core.database import get_db
+from app.services.notification_counters import notification_counters
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Iterable, Optional, List
+from dotenv import load_dotenv
 import asyncio
 import logging
+import os
+import threading
+import time
+
+load_dotenv()
 
 logger = logging.getLogger(__name__)
 
 
-# Important activity types that should trigger admin notifications
-ADMIN_IMPORTANT_ACTIVITIES = {
-    "USER_REGISTERED",
-    "FAILED_LOGIN", 
-    "SUBSCRIPTION_PURCHASED",
-    "PROFILE_UPDATED",
-    "PASSWORD_CHANGED",
-    "ACCOUNT_DEACTIVATED",
-    "PAYMENT_FAILED",
-    "WORKOUT_COMPLETED",
-    "GOAL_ACHIEVED",
-    "SUSPICIOUS_ACTIVITY"
-}
+# Seconds a worker serves notification totals from its snapshot before
+# recounting (picks up rows written by other workers); 0 disables the snapshot
+NOTIFICATION_STATS_CACHE_TTL_SECONDS = float(os.getenv("NOTIFICATION_STATS_CACHE_TTL_SECONDS", "30"))
+
+
+class NotificationStatsCache:
+    """
+    Per-worker snapshot of activity_logs row counts by activity_type (read
+    and unread), loaded with one GROUP BY query and kept up to date by the
+    activity pipeline. Unread counts come from notification_counters, so the
+    stats and the unread badge always agree.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Optional[Dict[str, int]] = None
+        self._loaded_at = 0.0
+        # Bumped on every change so a load racing with it is not cached
+        self._version = 0
+
+    def get_totals(self, db: Session) -> Dict[str, int]:
+        with self._lock:
+            if self._totals is not None and time.monotonic() - self._loaded_at < NOTIFICATION_STATS_CACHE_TTL_SECONDS:
+                return dict(self._totals)
+            version = self._version
+
+        loaded_at = time.monotonic()
+        rows = db.query(
+            UserActivityLog.activity_type,
+            func.count()
+        ).group_by(UserActivityLog.activity_type).all()
+        totals = {activity_type: count for activity_type, count in rows}
+
+        with self._lock:
+            if version == self._version:
+                self._totals = totals
+                self._loaded_at = loaded_at
+        return dict(totals)
+
+    def record_inserted(self, activity_types: Iterable[str]):
+        """Count newly inserted activity logs."""
+        with self._lock:
+            self._version += 1
+            if self._totals is None:
+                return
+            for activity_type in activity_types:
+                self._totals[activity_type] = self._totals.get(activity_type, 0) + 1
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._totals = None
+
+
+# Global instance for the application
+notification_stats_cache = NotificationStatsCache()
 
 
 class NotificationService:
@@ -73,72 +124,60 @@ class NotificationService:
         username: str,
         activity_type: str,
         description: str
-    ) -> UserActivityLog:
+    ):
         """
-        Create a new activity log entry.
+        Queue a new activity log entry on the activity pipeline, which
+        inserts it with the next batch. No notification is sent.
         
         Args:
-            db: Database session
+            db: Database session (unused; the pipeline writes with its own sessions)
             user_id: Optional user ID
             username: Username
             activity_type: Type of activity
             description: Description of the activity
-            
-        Returns:
-            Created UserActivityLog instance
         """
-        activity_log = UserActivityLog(
+        # Imported here: the pipeline itself depends on this service
+        from app.services.activity_pipeline import ActivityEvent, activity_pipeline
+
+        activity_pipeline.emit(ActivityEvent(
             user_id=user_id,
             username=username,
             activity_type=activity_type,
-            description=description
-        )
-        
-        db.add(activity_log)
-        db.commit()
-        db.refresh(activity_log)
-        
-        logger.info(f"Activity log created: {activity_type} - {description}")
-        return activity_log
+            description=description,
+            created_at=datetime.utcnow(),
+            notify=False
+        ))
+        logger.debug(f"Activity log queued: {activity_type}")
     
     @staticmethod
     async def create_activity_and_notify(
-        db: Session,
+        db: AsyncSession,
         user_id: Optional[int],
         username: str,
         activity_type: str,
         description: str
-    ) -> UserActivityLog:
+    ):
         """
-        Create activity log and send WebSocket notification in one operation.
+        Queue an activity log on the activity pipeline; the WebSocket
+        notification is sent once its batch is written.
         
         Args:
-            db: Database session
+            db: Async database session (unused; the pipeline writes with its own sessions)
             user_id: Optional user ID
             username: Username
             activity_type: Type of activity
             description: Description of the activity
-            
-        Returns:
-            Created UserActivityLog instance
         """
-        # Create the activity log first
-        activity_log = NotificationService.create_activity_log(
-            db=db,
+        from app.services.activity_pipeline import ActivityEvent, activity_pipeline
+
+        activity_pipeline.emit(ActivityEvent(
             user_id=user_id,
             username=username,
             activity_type=activity_type,
-            description=description
-        )
-        
-        # Send WebSocket notification asynchronously
-        try:
-            await NotificationService.send_notification_to_admins(activity_log)
-        except Exception as e:
-            logger.error(f"Failed to send WebSocket notification: {e}")
-            # Don't fail the whole operation if WebSocket fails
-        
-        return activity_log
+            description=description,
+            created_at=datetime.utcnow()
+        ))
+        logger.debug(f"Activity log queued: {activity_type}")
     
     @staticmethod
     def get_recent_notifications(
@@ -180,39 +219,27 @@ class NotificationService:
         Returns:
             Dictionary with notification statistics
         """
-        total_notifications = db.query(UserActivityLog).count()
-        admin_notifications = db.query(UserActivityLog).filter(
-            UserActivityLog.activity_type.in_(ADMIN_IMPORTANT_ACTIVITIES)
-        ).count()
-        
-        # Get read/unread counts
-        admin_unread = db.query(UserActivityLog).filter(
-            and_(
-                UserActivityLog.activity_type.in_(ADMIN_IMPORTANT_ACTIVITIES),
-                UserActivityLog.is_read == False
-            )
-        ).count()
+        totals = notification_stats_cache.get_totals(db)
+        unread_counts = notification_counters.get_unread_counts(db)
         
-        admin_read = admin_notifications - admin_unread
+        total_notifications = sum(totals.values())
         
         # Get counts by activity type
         activity_counts = {}
         for activity_type in ADMIN_IMPORTANT_ACTIVITIES:
-            total_count = db.query(UserActivityLog).filter(
-                UserActivityLog.activity_type == activity_type
-            ).count()
-            unread_count = db.query(UserActivityLog).filter(
-                and_(
-                    UserActivityLog.activity_type == activity_type,
-                    UserActivityLog.is_read == False
-                )
-            ).count()
+            total_count = totals.get(activity_type, 0)
+            unread_count = unread_counts.get(activity_type, 0)
             activity_counts[activity_type] = {
                 "total": total_count,
                 "unread": unread_count,
-                "read": total_count - unread_count
+                # The totals snapshot may lag the counters by a few seconds
+                "read": max(total_count - unread_count, 0)
             }
         
+        admin_notifications = sum(type_counts["total"] for type_counts in activity_counts.values())
+        admin_unread = sum(type_counts["unread"] for type_counts in activity_counts.values())
+        admin_read = sum(type_counts["read"] for type_counts in activity_counts.values())
+        
         return {
             "total_notifications": total_notifications,
             "admin_notifications": admin_notifications,
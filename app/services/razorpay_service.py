@@ -94,12 +94,14 @@ class RazorpayService:
 
                 # Create subscription
                 self._create_subscription_from_payment(payment, db)
+                db.commit()
 
                 logger.info(f"Payment completed and subscription created: {payment.id}")
                 return True
             else:
                 payment.status = 'failed'
                 payment.webhook_processed = True
+                db.commit()
                 logger.error(f"Payment failed: {payment_id}")
                 return False
 
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.services.fitness_services import FitnessActivityService
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of rollup jobs processed with one database session
+ROLLUP_BATCH_SIZE = 100
+# How long the worker waits for more jobs before processing a partial batch
+ROLLUP_FLUSH_INTERVAL_SECONDS = 1.0
+
+
+class RollupWorker:
+    """
+    Background compaction worker for monthly and yearly activity rollups.
+
+    Request handlers only enqueue "user X needs a rollup check for month M";
+    the worker drains the queue on the event loop, batching jobs across users
+    and running the database work in a thread so the loop is never blocked.
+    Jobs for the same (user, year, month) are coalesced while queued.
+
+    Job statuses are stored in user_rollup_status, so any worker process can
+    answer GET /activity/rollup-status for a job queued by another one. The
+    queue itself is in memory; jobs still recorded as queued or running are
+    queued again when a worker starts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: "OrderedDict[Tuple[int, int, int], date]" = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    async def start(self):
+        """Start the worker task on the running event loop."""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        await asyncio.to_thread(self._requeue_unfinished)
+        self._task = asyncio.create_task(self._run())
+        logger.info("Rollup worker started")
+
+    async def stop(self):
+        """Process any queued jobs and stop the worker task."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        logger.info("Rollup worker stopped")
+
+    def enqueue(self, user_id: int, activity_date: date, db: Optional[Session] = None) -> str:
+        """
+        Queue a rollup check for the user and the month of `activity_date`.
+        Safe to call from request handlers running in the threadpool; pass the
+        request's session as `db` so the "queued" status is written on the
+        connection it already holds.
+        """
+        self._save_status(
+            [user_id], "queued", db=db,
+            queued_at=datetime.utcnow(),
+            completed_at=None,
+            activity_date=activity_date
+        )
+        self._add_pending(user_id, activity_date)
+        return "queued"
+
+    def _add_pending(self, user_id: int, activity_date: date):
+        key = (user_id, activity_date.year, activity_date.month)
+        with self._lock:
+            self._pending[key] = activity_date
+
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def get_status(self, db: Session, user_id: int) -> dict:
+        """Return the latest rollup status recorded for the user."""
+        return FitnessActivityService(db).get_rollup_status(user_id) or {"status": "idle"}
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _save_status(self, user_ids: List[int], status: str, db: Optional[Session] = None, **fields):
+        """
+        Write the status of users' rollup jobs and commit, with its own session
+        unless `db` is given. Failures are logged; a status is informational and
+        never holds up the rollup itself.
+        """
+        session = db or SessionLocal()
+        try:
+            FitnessActivityService(session).save_rollup_status(user_ids, status, **fields)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Could not record rollup status '{status}' for users {user_ids}: {e}")
+        finally:
+            if db is None:
+                session.close()
+
+    def _requeue_unfinished(self):
+        """
+        Queue the jobs left queued or running by a worker that stopped before
+        processing them. Rollups check the current state, so a job another
+        worker is still running is only checked twice.
+        """
+        db = SessionLocal()
+        try:
+            jobs = FitnessActivityService(db).get_unfinished_rollups()
+        except Exception as e:
+            logger.error(f"Could not load unfinished rollup jobs: {e}")
+            return
+        finally:
+            db.close()
+
+        for user_id, activity_date in jobs:
+            self._add_pending(user_id, activity_date)
+        if jobs:
+            logger.info(f"Queued {len(jobs)} unfinished rollup jobs again")
+
+    def _take_batch(self) -> Dict[Tuple[int, int, int], date]:
+        with self._lock:
+            batch = {}
+            while self._pending and len(batch) < ROLLUP_BATCH_SIZE:
+                key, activity_date = self._pending.popitem(last=False)
+                batch[key] = activity_date
+            return batch
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=ROLLUP_FLUSH_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    break
+                try:
+                    await asyncio.to_thread(self._process_batch, batch)
+                except Exception as e:
+                    logger.error(f"Rollup batch failed: {e}")
+
+            if self._stopping:
+                return
+
+    def _process_batch(self, batch: Dict[Tuple[int, int, int], date]):
+        db = SessionLocal()
+        try:
+            fitness_service = FitnessActivityService(db)
+            self._save_status(sorted({user_id for user_id, _, _ in batch}), "running", db=db)
+            for (user_id, _, _), activity_date in batch.items():
+                try:
+                    result = fitness_service.run_rollups(user_id, activity_date)
+                    self._save_status(
+                        [user_id], "completed", db=db,
+                        completed_at=datetime.utcnow(),
+                        result=result,
+                        error=None
+                    )
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Rollup failed for user {user_id}: {e}")
+                    self._save_status(
+                        [user_id], "failed", db=db,
+                        completed_at=datetime.utcnow(),
+                        error=str(e)
+                    )
+        finally:
+            db.close()
+
+
+# Global instance for the application
+rollup_worker = RollupWorker()
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from app.core.database import SessionLocal
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# How often coalesced "last used" touches are written to refresh_tokens
+SESSION_TOUCH_FLUSH_INTERVAL_SECONDS = float(os.getenv("SESSION_TOUCH_FLUSH_INTERVAL_SECONDS", "5"))
+# Maximum number of users updated by one UPDATE statement
+SESSION_TOUCH_BATCH_SIZE = 500
+
+# The session of a user is their most recently used, non-revoked refresh token
+# (never-used tokens sort last on every database)
+MOST_RECENT_TOKEN_SQL = """
+    SELECT r.id FROM refresh_tokens r
+    WHERE r.user_id = {user_id} AND r.is_revoked = false
+    ORDER BY r.last_used_at IS NULL, r.last_used_at DESC
+    LIMIT 1
+"""
+
+
+class SessionTouchTracker:
+    """
+    Coalesces "session last used" updates in memory and writes them to
+    refresh_tokens in periodic batches, so an authenticated request costs a
+    dictionary write instead of an UPDATE and COMMIT. Each session is written
+    at most once per flush interval.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[int, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    def touch(self, user_id: int):
+        """Record that the user's session was used now. Safe to call from any thread."""
+        with self._lock:
+            self._pending[user_id] = datetime.utcnow()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    async def start(self):
+        """Start the periodic flush task on the running event loop."""
+        if self._task is not None:
+            return
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Session touch tracker started")
+
+    async def stop(self):
+        """Flush any pending touches and stop the flush task."""
+        if self._task is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+        logger.info("Session touch tracker stopped")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=SESSION_TOUCH_FLUSH_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.error(f"Session touch flush failed: {e}")
+            if self._stopping.is_set():
+                return
+
+    def flush(self) -> int:
+        """Write all pending touches; returns the number of users flushed."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        touches = list(pending.items())
+        db = SessionLocal()
+        try:
+            for start in range(0, len(touches), SESSION_TOUCH_BATCH_SIZE):
+                self._write_batch(db, touches[start:start + SESSION_TOUCH_BATCH_SIZE])
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Keep the touches for the next flush unless newer ones arrived
+            with self._lock:
+                for user_id, seen_at in touches:
+                    self._pending.setdefault(user_id, seen_at)
+            raise
+        finally:
+            db.close()
+        return len(touches)
+
+    def _write_batch(self, db, touches):
+        if db.get_bind().dialect.name == "postgresql":
+            # One statement for the whole batch
+            values = ", ".join(
+                f"(CAST(:user_id_{i} AS INTEGER), CAST(:seen_at_{i} AS TIMESTAMP))" for i in range(len(touches))
+            )
+            params = {}
+            for i, (user_id, seen_at) in enumerate(touches):
+                params[f"user_id_{i}"] = user_id
+                params[f"seen_at_{i}"] = seen_at
+            db.execute(text(f"""
+                UPDATE refresh_tokens AS rt
+                SET last_used_at = v.seen_at
+                FROM (VALUES {values}) AS v(user_id, seen_at)
+                WHERE rt.id = ({MOST_RECENT_TOKEN_SQL.format(user_id="v.user_id")})
+            """), params)
+        else:
+            db.execute(text(f"""
+                UPDATE refresh_tokens
+                SET last_used_at = :seen_at
+                WHERE id = ({MOST_RECENT_TOKEN_SQL.format(user_id=":user_id")})
+            """), [{"user_id": user_id, "seen_at": seen_at} for user_id, seen_at in touches])
+
+
+# Global instance for the application
+session_tracker = SessionTouchTracker()
@@ -2,6 +2,7 @@ import os
 import uuid
 from typing import Optional, Tuple
 from fastapi import UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from PIL import Image
 import cloudinary
 import cloudinary.uploader
@@ -95,7 +96,8 @@ class WorkoutMediaService:
             await file.seek(0)
 
             # Upload to Cloudinary (no overwrite to create new image)
-            upload_result = cloudinary.uploader.upload(
+            upload_result = await run_in_threadpool(
+                cloudinary.uploader.upload,
                 file.file,
                 public_id=public_id,
                 folder=self.image_upload_folder,
@@ -130,7 +132,8 @@ class WorkoutMediaService:
             await file.seek(0)
 
             # Upload to Cloudinary (no overwrite to create new video)
-            upload_result = cloudinary.uploader.upload(
+            upload_result = await run_in_threadpool(
+                cloudinary.uploader.upload,
                 file.file,
                 public_id=public_id,
                 folder=self.video_upload_folder,
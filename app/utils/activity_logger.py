@@ -1,8 +1,7 @@
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 from typing import Optional
-from app.models.user_activity_log import UserActivityLog
-from app.services.notification_service import notification_service
+from app.services.activity_pipeline import ActivityEvent, activity_pipeline
 
 # Define IST timezone using zoneinfo (Python 3.9+)
 try:
@@ -29,52 +28,34 @@ ACTIVITY_TYPE_MAPPING = {
 }
 
 
-def log_activity(db: Session, user_id: Optional[int], username: str, activity_type: str, description: str, send_notification: bool = True) -> UserActivityLog:
+def log_activity(db: Session, user_id: Optional[int], username: str, activity_type: str, description: str, send_notification: bool = True):
     """
-    Log user activity to the database.
+    Log user activity without blocking the request.
+    
+    The event is queued on the activity pipeline, which writes it to the
+    database in a batch and sends the WebSocket notification for
+    admin-important activities.
     
     Args:
-        db: Database session
+        db: Database session (unused; the pipeline uses its own sessions and
+            never commits the caller's transaction)
         user_id: ID of the user performing the activity (nullable for system events)
         username: Username of the user
         activity_type: Type of activity (e.g., "signup", "profile_update", "subscription_purchase")
         description: Human-readable description (e.g., "Suraj signed up", "Suraj updated profile")
         send_notification: Whether to send WebSocket notification for admin-important activities
-    
-    Returns:
-        UserActivityLog: The created activity log entry
     """
     # Map activity type to admin notification format
     mapped_activity_type = ACTIVITY_TYPE_MAPPING.get(activity_type, activity_type.upper())
     
-    activity_log = UserActivityLog(
+    activity_pipeline.emit(ActivityEvent(
         user_id=user_id,
         username=username,
         activity_type=mapped_activity_type,
         description=description,
-        created_at=datetime.utcnow()  # Store UTC internally
-    )
-    
-    db.add(activity_log)
-    db.commit()
-    db.refresh(activity_log)
-    
-    # Send WebSocket notification if enabled and activity is admin-important
-    if send_notification and notification_service.is_admin_important_activity(mapped_activity_type):
-        try:
-            # Create an event loop to run the async function
-            import asyncio
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                loop.run_until_complete(notification_service.send_notification_to_admins(activity_log))
-            finally:
-                loop.close()
-        except Exception as e:
-            # Log error but don't fail the activity logging
-            print(f"Failed to send WebSocket notification: {e}")
-    
-    return activity_log
+        created_at=datetime.utcnow(),  # Store UTC internally
+        notify=send_notification
+    ))
 
 
 def time_ago(utc_time: Optional[datetime]) -> str:
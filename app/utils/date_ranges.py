@@ -0,0 +1,37 @@
+from datetime import date, timedelta
+from typing import List, Tuple
+import calendar
+
+# Day-of-month boundaries of the 4 analytics weeks; week 4 runs to month end
+MONTH_WEEK_START_DAYS = (1, 8, 15, 22)
+
+
+def month_range(year: int, month: int) -> Tuple[date, date]:
+    """
+    Get the half-open date range [start, end) covering a calendar month.
+
+    Use as `date >= :start AND date < :end` so the (user_id, date) index
+    can be range-scanned instead of evaluating EXTRACT() on every row.
+    """
+    start = date(year, month, 1)
+    end = start + timedelta(days=calendar.monthrange(year, month)[1])
+    return start, end
+
+
+def month_week_ranges(year: int, month: int) -> List[Tuple[int, date, date]]:
+    """
+    Get the 4 analytics weeks of a month as (week_number, start, end) tuples
+    with half-open [start, end) ranges. Week 4 absorbs days 29-31.
+    """
+    month_start, month_end = month_range(year, month)
+
+    weeks = []
+    for index, start_day in enumerate(MONTH_WEEK_START_DAYS):
+        week_start = month_start.replace(day=start_day)
+        if index + 1 < len(MONTH_WEEK_START_DAYS):
+            week_end = month_start.replace(day=MONTH_WEEK_START_DAYS[index + 1])
+        else:
+            week_end = month_end
+        weeks.append((index + 1, week_start, week_end))
+
+    return weeks
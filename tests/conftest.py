@@ -0,0 +1,41 @@
+import os
+import tempfile
+
+# Modules read their settings at import time; point them at a throwaway
+# SQLite database before anything from app is imported
+_db_dir = tempfile.mkdtemp(prefix="fitness-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.setdefault("JWT_SECRET_KEY", "test-jwt-secret")
+os.environ.setdefault("ADMIN_SECRET_KEY", "test-admin-secret")
+
+import pytest
+from sqlalchemy import event
+
+import app.main  # noqa: F401  creates the tables and loads every mapper
+from app.core.database import Base, SessionLocal, engine
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+        with engine.begin() as connection:
+            for table in reversed(Base.metadata.sorted_tables):
+                connection.execute(table.delete())
+
+
+@pytest.fixture
+def captured_statements():
+    """(SQL, parameters) of every statement executed on the sync engine during the test."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(engine, "before_cursor_execute", capture)
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from app.models.user_activity_log import UserActivityLog
+from app.services import activity_pipeline as activity_pipeline_module
+from app.services.activity_pipeline import ActivityEvent, ActivityPipeline
+
+
+def make_event(description: str = "walker signed up", **fields) -> ActivityEvent:
+    values = {
+        "user_id": 1,
+        "username": "walker",
+        "activity_type": "USER_REGISTERED",
+        "description": description,
+        "created_at": datetime.utcnow(),
+    }
+    values.update(fields)
+    return ActivityEvent(**values)
+
+
+def failing_write(delay: float = 0.0):
+    def write(batch):
+        time.sleep(delay)
+        raise RuntimeError("database is down")
+    return write
+
+
+def test_fallback_write_on_the_event_loop_neither_blocks_nor_raises(monkeypatch):
+    pipeline = ActivityPipeline()
+    monkeypatch.setattr(pipeline, "_write_batch", failing_write(delay=0.3))
+
+    async def scenario():
+        started = time.monotonic()
+        pipeline.emit(make_event())
+        emit_seconds = time.monotonic() - started
+        # The write runs (and fails) in a worker thread
+        while pipeline.get_stats()["dropped"] == 0:
+            await asyncio.sleep(0.05)
+        return emit_seconds
+
+    emit_seconds = asyncio.run(scenario())
+
+    assert emit_seconds < 0.1
+    assert pipeline.get_stats()["dropped"] == 1
+
+
+def test_fallback_write_failure_from_a_thread_does_not_raise(monkeypatch):
+    pipeline = ActivityPipeline()
+    monkeypatch.setattr(pipeline, "_write_batch", failing_write())
+
+    pipeline.emit(make_event())
+
+    assert pipeline.get_stats()["dropped"] == 1
+
+
+def test_full_queue_on_the_event_loop_drops_instead_of_writing(monkeypatch):
+    monkeypatch.setattr(activity_pipeline_module, "ACTIVITY_PIPELINE_MAX_PENDING", 1)
+    pipeline = ActivityPipeline()
+    writes = []
+    monkeypatch.setattr(pipeline, "_write_batch", writes.append)
+
+    async def scenario():
+        # Accepting, but the consumer is not draining the queue
+        pipeline._loop = asyncio.get_running_loop()
+        pipeline._wakeup = asyncio.Event()
+        pipeline._batch_ready = asyncio.Event()
+        pipeline._accepting = True
+        pipeline.emit(make_event("first"))
+        pipeline.emit(make_event("second"))
+
+    asyncio.run(scenario())
+
+    assert pipeline.get_stats()["pending"] == 1
+    assert pipeline.get_stats()["dropped"] == 1
+    assert writes == []
+
+
+def test_one_invalid_event_does_not_drop_the_rest_of_its_batch(db):
+    pipeline = ActivityPipeline()
+    batch = [make_event(f"event {number}") for number in range(4)]
+    batch.insert(2, make_event("no username", username=None))
+
+    unwritten = asyncio.run(pipeline._process(batch))
+
+    assert unwritten == []
+    stored = db.execute(select(UserActivityLog.description).order_by(UserActivityLog.id)).scalars().all()
+    assert stored == ["event 0", "event 1", "event 2", "event 3"]
+    assert pipeline.get_stats()["dropped"] == 1
+
+
+def test_events_stay_queued_while_the_database_is_unreachable(monkeypatch):
+    pipeline = ActivityPipeline()
+    attempts = []
+
+    def unreachable(batch):
+        attempts.append(len(batch))
+        raise OperationalError("INSERT INTO activity_logs", {}, ConnectionError("connection refused"))
+
+    monkeypatch.setattr(pipeline, "_write_batch", unreachable)
+    batch = [make_event(f"event {number}") for number in range(3)]
+
+    unwritten = asyncio.run(pipeline._process(batch))
+
+    assert unwritten == batch
+    # The batch twice, then the first row on its own
+    assert attempts == [3, 3, 1]
+    assert pipeline.get_stats()["dropped"] == 0
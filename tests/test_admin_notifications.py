@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException, Response
+
+from app.api.admin.notifications import get_notifications
+from app.models.user_activity_log import UserActivityLog
+
+
+def fetch_page(db, limit: int, before_id=None, before_created_at=None):
+    response = Response()
+    notifications = get_notifications(
+        response, limit=limit, activity_type=None, include_read=False,
+        before_id=before_id, before_created_at=before_created_at, db=db, current_admin=None
+    )
+    return notifications, response.headers
+
+
+def test_pages_cross_a_created_at_tie_without_skipping_or_repeating(db):
+    tied = datetime(2026, 10, 1, 12, 0, 0)
+    created = [tied - timedelta(minutes=5), tied, tied, tied, tied + timedelta(minutes=5)]
+    for number, created_at in enumerate(created):
+        db.add(UserActivityLog(username="walker", activity_type="USER_REGISTERED",
+                               description=f"event {number}", created_at=created_at))
+    db.commit()
+    expected = [log.id for log in sorted(db.query(UserActivityLog).all(),
+                                         key=lambda log: (log.created_at, log.id), reverse=True)]
+
+    seen = []
+    cursor = {}
+    while True:
+        notifications, headers = fetch_page(db, limit=2, **cursor)
+        seen.extend(notification["id"] for notification in notifications)
+        if "X-Next-Before-Id" not in headers:
+            break
+        cursor = {
+            "before_id": int(headers["X-Next-Before-Id"]),
+            "before_created_at": datetime.fromisoformat(headers["X-Next-Before-Created-At"])
+        }
+
+    # The second page boundary falls inside the three tied rows
+    assert seen == expected
+    assert len(seen) == 5
+
+
+def test_half_given_cursor_is_rejected(db):
+    with pytest.raises(HTTPException) as error:
+        fetch_page(db, limit=2, before_id=10)
+
+    assert error.value.status_code == 400
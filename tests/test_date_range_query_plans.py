@@ -0,0 +1,54 @@
+from datetime import date
+
+from app.services.fitness_services import FitnessActivityService
+from app.utils.date_ranges import month_range
+
+RANGE_SEARCH = "(user_id=? AND date>? AND date<?)"
+
+
+def unique_user_date_index(db) -> str:
+    """Name of the index backing unique_user_date (SQLite names it sqlite_autoindex_*)."""
+    for row in db.connection().exec_driver_sql("PRAGMA index_list(daily_activities)"):
+        name, unique = row[1], row[2]
+        columns = [info[2] for info in db.connection().exec_driver_sql(f"PRAGMA index_info('{name}')")]
+        if unique and columns == ["user_id", "date"]:
+            return name
+    raise AssertionError("daily_activities has no unique (user_id, date) index")
+
+
+def query_plan(db, captured_statements, table: str) -> list:
+    """EXPLAIN QUERY PLAN of the last captured statement that touches `table`."""
+    statement, parameters = next(
+        (statement, parameters) for statement, parameters in reversed(captured_statements)
+        if table in statement and not statement.lstrip().upper().startswith("EXPLAIN")
+    )
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return [row[3] for row in rows]
+
+
+def assert_index_range_search(db, plan: list):
+    assert f"SEARCH daily_activities USING INDEX {unique_user_date_index(db)} {RANGE_SEARCH}" in plan, plan
+    assert not any(step.startswith("SCAN") for step in plan), plan
+
+
+def test_month_range_is_half_open():
+    assert month_range(2024, 2) == (date(2024, 2, 1), date(2024, 3, 1))
+    assert month_range(2026, 12) == (date(2026, 12, 1), date(2027, 1, 1))
+
+
+def test_monthly_daily_records_range_scan_the_user_date_index(db, captured_statements):
+    FitnessActivityService(db).get_monthly_daily_records(1, 2026, 9)
+
+    assert_index_range_search(db, query_plan(db, captured_statements, "daily_activities"))
+
+
+def test_delete_daily_records_for_month_range_scans_the_user_date_index(db, captured_statements):
+    FitnessActivityService(db).delete_daily_records_for_month(1, 2026, 9)
+
+    assert_index_range_search(db, query_plan(db, captured_statements, "daily_activities"))
+
+
+def test_weekly_totals_range_scan_the_user_date_index(db, captured_statements):
+    FitnessActivityService(db).get_weekly_totals(1, date(2026, 9, 1), date(2026, 10, 1), 4)
+
+    assert_index_range_search(db, query_plan(db, captured_statements, "daily_activities"))
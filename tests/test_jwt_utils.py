@@ -0,0 +1,72 @@
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from jose import JWTError, jwt
+
+from app.core import jwt_utils
+from app.core.jwt_utils import JWT_ALGORITHM, JWT_SECRET_KEY, create_access_token, decode_access_token
+
+
+@pytest.fixture
+def signature_checks(monkeypatch):
+    """Counts calls into jose's jwt.decode, which verifies the signature."""
+    calls = []
+    real_decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt_utils.jwt, "decode", counting_decode)
+    jwt_utils._verified_token_cache.clear()
+    yield calls
+    jwt_utils._verified_token_cache.clear()
+
+
+def test_cache_hit_skips_signature_verification(signature_checks):
+    token = create_access_token(7)
+
+    first = decode_access_token(token)
+    second = decode_access_token(token)
+
+    assert first == second
+    assert first["sub"] == "7"
+    assert len(signature_checks) == 1
+
+
+def test_expired_token_is_rejected_on_cache_hit(signature_checks, monkeypatch):
+    token = create_access_token(7)
+    decode_access_token(token)
+
+    # An hour and a minute later the cached entry has passed its exp
+    later = time.time() + 3660
+    monkeypatch.setattr(jwt_utils, "time", SimpleNamespace(time=lambda: later))
+
+    with pytest.raises(JWTError):
+        decode_access_token(token)
+    # The expired entry was dropped and the token verified again
+    assert len(signature_checks) == 2
+
+
+def test_invalid_tokens_are_never_cached(signature_checks):
+    forged = jwt.encode(
+        {"sub": "7", "type": "access", "exp": datetime.utcnow() + timedelta(minutes=5)},
+        "not-the-secret", algorithm=JWT_ALGORITHM
+    )
+
+    for _ in range(2):
+        with pytest.raises(JWTError):
+            decode_access_token(forged)
+    assert len(signature_checks) == 2
+    assert len(jwt_utils._verified_token_cache) == 0
+
+
+def test_realms_do_not_share_cache_entries(signature_checks):
+    token = create_access_token(7)
+
+    jwt_utils.decode_verified_token(token, JWT_SECRET_KEY, "user")
+    jwt_utils.decode_verified_token(token, JWT_SECRET_KEY, "admin")
+
+    assert len(signature_checks) == 2
@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from app.api.admin.notifications import mark_notification_as_read
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.models.notification_counter import NotificationCounter
+from app.models.user_activity_log import UserActivityLog
+from app.services.notification_counters import NotificationCounters, notification_counters
+from app.services.notification_service import notification_service, notification_stats_cache
+
+
+def add_unread_logs(db, activity_type: str, count: int):
+    for number in range(count):
+        db.add(UserActivityLog(
+            username="walker", activity_type=activity_type,
+            description=f"{activity_type} {number}", created_at=datetime.utcnow()
+        ))
+
+
+def stored_counts(db):
+    db.expire_all()
+    return {row.activity_type: row.unread_count for row in db.scalars(select(NotificationCounter))}
+
+
+def actual_unread(db, activity_type: str) -> int:
+    return db.scalar(
+        select(func.count()).select_from(UserActivityLog)
+        .where(UserActivityLog.activity_type == activity_type, UserActivityLog.is_read.is_(False))
+    )
+
+
+def test_reconcile_corrects_drifted_and_missing_counters(db):
+    counters = NotificationCounters()
+    add_unread_logs(db, "USER_REGISTERED", 3)
+    add_unread_logs(db, "USER_LOGIN", 2)
+    db.add(NotificationCounter(activity_type="USER_REGISTERED", unread_count=7))
+    db.add(NotificationCounter(activity_type="PASSWORD_CHANGED", unread_count=4))
+    db.commit()
+
+    counters.reconcile()
+
+    assert stored_counts(db) == {"USER_REGISTERED": 3, "USER_LOGIN": 2, "PASSWORD_CHANGED": 0}
+
+
+def test_increment_committed_during_reconcile_is_not_lost(db, monkeypatch):
+    counters = NotificationCounters()
+    add_unread_logs(db, "USER_REGISTERED", 3)
+    db.add(NotificationCounter(activity_type="USER_REGISTERED", unread_count=5))
+    db.commit()
+
+    real_unread_deltas = counters._unread_deltas
+
+    def deltas_then_concurrent_write(session):
+        deltas = real_unread_deltas(session)
+        # Another worker logs two events after reconcile took its snapshot
+        other = SessionLocal()
+        try:
+            add_unread_logs(other, "USER_REGISTERED", 2)
+            counters.increment(other, ["USER_REGISTERED", "USER_REGISTERED"])
+            other.commit()
+        finally:
+            other.close()
+        return deltas
+
+    monkeypatch.setattr(counters, "_unread_deltas", deltas_then_concurrent_write)
+
+    counters.reconcile()
+
+    assert actual_unread(db, "USER_REGISTERED") == 5
+    assert stored_counts(db) == {"USER_REGISTERED": 5}
+
+
+async def mark_read_in_own_session(notification_id: int):
+    async with AsyncSessionLocal() as session:
+        return await mark_notification_as_read(notification_id, db=session, current_admin=None)
+
+
+def test_concurrent_mark_read_requests_decrement_once(db):
+    add_unread_logs(db, "USER_REGISTERED", 2)
+    db.add(NotificationCounter(activity_type="USER_REGISTERED", unread_count=2))
+    db.commit()
+    notification_id = db.scalar(select(func.min(UserActivityLog.id)))
+
+    async def double_click():
+        return await asyncio.gather(*(mark_read_in_own_session(notification_id) for _ in range(2)))
+
+    responses = asyncio.run(double_click())
+
+    assert [response["is_read"] for response in responses] == [True, True]
+    assert actual_unread(db, "USER_REGISTERED") == 1
+    assert stored_counts(db) == {"USER_REGISTERED": 1}
+
+
+def test_mark_read_of_a_missing_notification_is_404(db):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(mark_read_in_own_session(12345))
+
+    assert error.value.status_code == 404
+
+
+def test_stats_take_unread_counts_from_the_counters(db):
+    notification_counters.invalidate()
+    notification_stats_cache.invalidate()
+    add_unread_logs(db, "USER_REGISTERED", 3)
+    db.add(NotificationCounter(activity_type="USER_REGISTERED", unread_count=3))
+    db.commit()
+    notification_id = db.scalar(select(func.min(UserActivityLog.id)))
+
+    # Load both per-worker snapshots, then change the unread count
+    notification_service.get_notification_stats(db)
+    asyncio.run(mark_read_in_own_session(notification_id))
+    stats = notification_service.get_notification_stats(db)
+
+    assert stats["activity_counts"]["USER_REGISTERED"] == {"total": 3, "unread": 2, "read": 1}
+    assert stats["admin_unread"] == notification_counters.get_unread_count(db, ["USER_REGISTERED"]) == 2
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+import app.api.v1.auth as user_auth
+from app.core import password_hasher as password_hasher_module
+from app.core.password_hasher import PasswordHasher
+from app.main import app
+from app.models.user import User
+
+SLOW_HASH_SECONDS = 0.5
+
+
+@pytest.fixture
+def slow_bcrypt(monkeypatch):
+    def slow_check(secret: str, hashed: str) -> bool:
+        time.sleep(SLOW_HASH_SECONDS)
+        return secret == hashed
+
+    monkeypatch.setattr(password_hasher_module, "_bcrypt_check", slow_check)
+
+
+@pytest.fixture
+def small_hasher(monkeypatch, slow_bcrypt):
+    hasher = PasswordHasher(max_workers=1, max_queue=1, max_blocking_callers=2)
+    monkeypatch.setattr(user_auth, "password_hasher", hasher)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_logins_beyond_the_bound_get_503_while_other_endpoints_respond(db, small_hasher):
+    db.add(User(id=1, username="walker", email="walker@example.com", password="secret"))
+    db.commit()
+
+    async def storm():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            logins = [
+                asyncio.create_task(client.post("/api/v1/login", json={"email": "walker@example.com", "password": "secret"}))
+                for _ in range(10)
+            ]
+            await asyncio.sleep(0.05)
+            started = time.monotonic()
+            other = await client.get("/")
+            other_seconds = time.monotonic() - started
+            return [response.status_code for response in await asyncio.gather(*logins)], other, other_seconds
+
+    statuses, other, other_seconds = asyncio.run(storm())
+
+    # One login hashing, one queued; the rest are turned away immediately
+    assert sorted(statuses) == [200, 200] + [503] * 8
+    assert other.status_code == 200
+    assert other_seconds < SLOW_HASH_SECONDS
+    assert small_hasher.get_stats()["rejected"] == 8
+
+
+def test_blocking_callers_beyond_the_bound_are_rejected(slow_bcrypt):
+    hasher = PasswordHasher(max_workers=1, max_queue=10, max_blocking_callers=2)
+    results = []
+
+    def verify():
+        try:
+            results.append(hasher.verify("secret", "secret"))
+        except HTTPException as e:
+            results.append(e.status_code)
+
+    threads = [threading.Thread(target=verify) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    hasher.shutdown()
+
+    # Only two sync callers may hold a thread waiting on bcrypt
+    assert results.count(True) == 2
+    assert results.count(503) == 4
+
+
+def test_cancelled_verify_is_not_treated_as_a_plaintext_match(small_hasher):
+    async def scenario():
+        # A stored value equal to the password would match the plaintext fallback
+        verify = asyncio.create_task(user_auth.verify_password_async("secret", "secret"))
+        await asyncio.sleep(0.05)
+        verify.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await verify
+
+    asyncio.run(scenario())
@@ -0,0 +1,91 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app.core.database import SessionLocal
+from app.models.rollup_state import UserRollupOpenMonth
+from app.models.user import User
+from app.services import fitness_services
+from app.services.fitness_services import FitnessActivityService, RollupState, invalidate_rollup_state
+
+
+@pytest.fixture
+def user_id(db):
+    db.add(User(id=1, username="walker", email="walker@example.com", password="x"))
+    db.commit()
+    invalidate_rollup_state(1)
+    yield 1
+    invalidate_rollup_state(1)
+
+
+def stored_open_months(db, user_id: int) -> set:
+    db.expire_all()
+    return set(db.scalars(select(UserRollupOpenMonth.month).where(UserRollupOpenMonth.user_id == user_id)))
+
+
+def sync_day(activity_date: date, user_id: int = 1):
+    session = SessionLocal()
+    try:
+        FitnessActivityService(session).upsert_daily_activity(user_id, activity_date, 1000, 1.0, 50.0, 10.0)
+    finally:
+        session.close()
+
+
+def test_syncs_from_stale_caches_keep_every_open_month(db, user_id):
+    sync_day(date(2026, 9, 5))
+    stale = FitnessActivityService(db).get_rollup_state(user_id)
+    assert stale.open_months == {202609}
+
+    # Two workers whose caches both predate the other's sync
+    sync_day(date(2026, 10, 1))
+    fitness_services._rollup_state_cache.set(user_id, stale)
+    sync_day(date(2026, 11, 1))
+
+    assert stored_open_months(db, user_id) == {202609, 202610, 202611}
+
+
+def test_closing_a_month_keeps_months_opened_meanwhile(db, user_id):
+    sync_day(date(2026, 9, 5))
+    stale = FitnessActivityService(db).get_rollup_state(user_id)
+
+    sync_day(date(2026, 10, 1))
+    fitness_services._rollup_state_cache.set(user_id, stale)
+    FitnessActivityService(db).aggregate_and_store_monthly_summaries([user_id], 2026, 9)
+
+    assert stored_open_months(db, user_id) == {202610}
+    state = FitnessActivityService(db).get_rollup_state(user_id)
+    assert state == RollupState(last_rolled_month=202609, open_months=frozenset({202610}))
+
+
+def test_last_rolled_month_never_moves_backwards(db, user_id):
+    service = FitnessActivityService(db)
+    service.close_open_months([user_id], 2026, 10)
+    service.close_open_months([user_id], 2026, 8)
+    db.commit()
+    invalidate_rollup_state(user_id)
+
+    assert service.get_rollup_state(user_id).last_rolled_month == 202610
+
+
+def test_closing_a_month_for_many_users_takes_a_fixed_number_of_statements(db, captured_statements):
+    user_ids = list(range(1, 21))
+    for number in user_ids:
+        db.add(User(id=number, username=f"walker{number}", email=f"walker{number}@example.com", password="x"))
+    db.commit()
+    for number in user_ids:
+        sync_day(date(2026, 9, 5), user_id=number)
+        sync_day(date(2026, 10, 1), user_id=number)
+        invalidate_rollup_state(number)
+    captured_statements.clear()
+
+    FitnessActivityService(db).close_open_months(user_ids, 2026, 9)
+    db.commit()
+
+    # State lookup, DELETE of the open months, upsert of last_rolled
+    assert len(captured_statements) == 3
+    for number in user_ids:
+        invalidate_rollup_state(number)
+    assert {FitnessActivityService(db).get_rollup_state(number) for number in user_ids} == {
+        RollupState(last_rolled_month=202609, open_months=frozenset({202610}))
+    }
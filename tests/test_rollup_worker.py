@@ -0,0 +1,49 @@
+import asyncio
+from datetime import date
+
+from app.models.rollup_state import UserRollupStatus
+from app.models.user import User
+from app.services import rollup_worker as rollup_worker_module
+from app.services.fitness_services import FitnessActivityService
+from app.services.rollup_worker import RollupWorker
+
+
+def no_new_sessions():
+    raise AssertionError("opened a second session")
+
+
+def test_enqueue_records_status_through_the_given_session(db, monkeypatch):
+    db.add(User(id=1, username="walker", email="walker@example.com", password="x"))
+    db.commit()
+    worker = RollupWorker()
+    monkeypatch.setattr(rollup_worker_module, "SessionLocal", no_new_sessions)
+
+    assert worker.enqueue(1, date(2026, 10, 3), db=db) == "queued"
+
+    assert worker.pending_count() == 1
+    status = worker.get_status(db, 1)
+    assert status["status"] == "queued"
+    assert status["queued_at"] is not None
+
+
+def test_start_queues_jobs_left_unfinished_by_a_previous_process(db, monkeypatch):
+    for user_id in (1, 2, 3):
+        db.add(User(id=user_id, username=f"walker{user_id}", email=f"walker{user_id}@example.com", password="x"))
+    db.commit()
+    FitnessActivityService(db).save_rollup_status([1], "queued", activity_date=date(2026, 10, 3))
+    FitnessActivityService(db).save_rollup_status([2], "running", activity_date=date(2026, 9, 14))
+    FitnessActivityService(db).save_rollup_status([3], "completed", activity_date=date(2026, 10, 1))
+    db.commit()
+
+    worker = RollupWorker()
+    processed = []
+    monkeypatch.setattr(worker, "_process_batch", lambda batch: processed.extend(batch.items()))
+
+    async def scenario():
+        await worker.start()
+        await worker.stop()
+
+    asyncio.run(scenario())
+
+    assert sorted(processed) == [((1, 2026, 10), date(2026, 10, 3)), ((2, 2026, 9), date(2026, 9, 14))]
+    assert db.get(UserRollupStatus, 3).status == "completed"
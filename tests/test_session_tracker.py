@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.core.jwt_utils import create_access_token, create_refresh_token
+from app.main import app
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.services.session_tracker import session_tracker
+
+
+def test_authenticated_requests_advance_last_used_after_a_flush(db):
+    long_ago = datetime.utcnow() - timedelta(days=3)
+    _, token_hash = create_refresh_token(1)
+    db.add(User(id=1, username="walker", email="walker@example.com", password="x"))
+    db.add(RefreshToken(user_id=1, token_hash=token_hash, jti="session-1",
+                        expires_at=datetime.utcnow() + timedelta(days=7), last_used_at=long_ago))
+    db.commit()
+    session_tracker.flush()
+
+    # No lifespan: the periodic flush task is not running, so the test flushes by hand
+    client = TestClient(app)
+    response = client.get("/api/v1/profile", headers={"Authorization": f"Bearer {create_access_token(1)}"})
+    assert response.status_code == 200
+
+    db.expire_all()
+    assert db.query(RefreshToken.last_used_at).filter(RefreshToken.jti == "session-1").scalar() == long_ago
+    assert session_tracker.pending_count() == 1
+
+    assert session_tracker.flush() == 1
+    db.expire_all()
+    assert db.query(RefreshToken.last_used_at).filter(RefreshToken.jti == "session-1").scalar() > long_ago
@@ -0,0 +1,42 @@
+import asyncio
+
+from app.core import websocket_manager as websocket_manager_module
+from app.core.websocket_manager import WebSocketManager
+
+
+class StuckWebSocket:
+    """A client that never reads: sends hang, close is recorded."""
+
+    def __init__(self):
+        self.closed = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        await asyncio.Event().wait()
+
+    async def close(self):
+        self.closed.set()
+
+
+def test_slow_consumer_is_disconnected_and_its_socket_closed(monkeypatch):
+    monkeypatch.setattr(websocket_manager_module, "WEBSOCKET_SEND_QUEUE_SIZE", 2)
+    monkeypatch.setattr(websocket_manager_module, "WEBSOCKET_QUEUE_FULL_POLICY", "disconnect")
+
+    async def scenario():
+        manager = WebSocketManager()
+        websocket = StuckWebSocket()
+        connection_id = await manager.connect(websocket)
+
+        for number in range(4):
+            await manager.broadcast_event("USER_REGISTERED", {"id": number})
+
+        assert connection_id not in manager.senders
+        # The close runs as a tracked background task until it finishes
+        assert len(manager._background_tasks) == 1
+        await asyncio.wait_for(websocket.closed.wait(), timeout=1)
+        await asyncio.sleep(0)
+        assert not manager._background_tasks
+
+    asyncio.run(scenario())